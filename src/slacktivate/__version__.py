@@ -1,3 +1,2 @@
-
 __version__ = "0.2.26"
-version_info = tuple(int(v) if v.isdigit() else v for v in __version__.split('.'))
+version_info = (0, 2, 26)
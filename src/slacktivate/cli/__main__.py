@@ -5,32 +5,26 @@ import textwrap
 import typing
 
 import click
-import click_help_colors
-import click_spinner
-import jinja2
 
 import slacktivate.__version__
-import slacktivate.cli.commands.channels
-import slacktivate.cli.commands.users
 import slacktivate.cli.helpers
-import slacktivate.cli.logo
-import slacktivate.helpers.dict_serializer
-import slacktivate.input.config
-import slacktivate.input.parsing
-import slacktivate.macros.manage
-import slacktivate.macros.provision
-import slacktivate.slack.classes
-import slacktivate.slack.methods
 
 
-try:
-    import dotenv
+_REPL_BANNER = textwrap.dedent("""
+    * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * *
+    WELCOME TO SLACKTIVATE v{version}---PYTHON v{py_version} REPL.
+    Preloaded object (`help(<obj>)` for documentation; [TAB] for completion):
+    - api / scim: Slack API and SCIM clients
+    - config: Slacktivate configuration file
+    - slacktivate: Slacktivate package
+                                               Made with ❤︎ in Princeton, N.J.
+    * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * *
+    """)[1:-1].format(
+    version=slacktivate.__version__,
+    py_version="{}.{}".format(sys.version_info.major, sys.version_info.minor),
+)
 
-    if not dotenv.load_dotenv():
-        dotenv.load_dotenv(dotenv.find_dotenv())
-
-except ImportError:
-    raise
+_REPL_FOOTER = "Thanks for using Slacktivate! Please star https://github.com/jlumbroso/slacktivate! ;-)"
 
 
 # TODO: implement the following
@@ -50,8 +44,15 @@ except ImportError:
 # validate
 
 
-@slacktivate.cli.helpers.cli_root
+@slacktivate.cli.helpers.cli_root_group_green
+@slacktivate.cli.helpers.cli_opt_token
+@slacktivate.cli.helpers.cli_opt_spec
+@slacktivate.cli.helpers.cli_opt_dry_run
+@slacktivate.cli.helpers.cli_opt_version
+@click.pass_context
 def cli(ctx: slacktivate.cli.helpers.AbstractSlacktivateCliContext, token, spec, dry_run):
+    # NOTE: any .env file is loaded by the group itself, before the options
+    # are parsed (see `slacktivate.cli.helpers.LazyGroup`)
     ctx.obj = slacktivate.cli.helpers.SlacktivateCliContextObject(
         dry_run=dry_run,
         slack_token=token,
@@ -70,6 +71,13 @@ def cli_repl(
     A Python REPL with the Slacktivate package, and Slack clients loaded
     preconfigured. This is convenient for quick and dirty operations.
     """
+    # only needed by the REPL, so not loaded for every other command
+    import slacktivate.cli.logo
+    import slacktivate.macros.manage
+    import slacktivate.macros.provision
+    import slacktivate.slack.classes
+    import slacktivate.slack.methods
+
     if spec is not None:
         ctx.obj.set_spec_file(spec_file=spec)
 
@@ -77,22 +85,6 @@ def cli_repl(
 
     client_api, client_scim = ctx.obj.login()
 
-    header = jinja2.Template(textwrap.dedent("""
-        * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * *
-        WELCOME TO SLACKTIVATE v{{ version }}---PYTHON v{{ py_version }} REPL.
-        Preloaded object (`help(<obj>)` for documentation; [TAB] for completion):
-        - api / scim: Slack API and SCIM clients
-        - config: Slacktivate configuration file
-        - slacktivate: Slacktivate package
-                                                   Made with ❤︎ in Princeton, N.J.
-        * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * *
-        """[1:-1])).render(
-        version=slacktivate.__version__,
-        py_version="{}.{}".format(sys.version_info.major, sys.version_info.minor),
-        token=ctx.obj.slack_token)
-
-    footer = "Thanks for using Slacktivate! Please star https://github.com/jlumbroso/slacktivate! ;-)"
-
     print(slacktivate.cli.logo.SLACK_LOGO_10L)
     print(slacktivate.cli.logo.SLACKTIVATE_LOGO_6L)
     slacktivate.cli.helpers.launch_repl(
@@ -119,12 +111,18 @@ def cli_repl(
             "users_list": slacktivate.macros.provision.users_list,
             "users_deactivate": slacktivate.macros.provision.users_deactivate,
         },
-        header=header,
-        footer=footer,
+        header=_REPL_BANNER,
+        footer=_REPL_FOOTER,
     )
 
 
-@cli.group(name="list")
+@cli.group(
+    name="list",
+    cls=slacktivate.cli.helpers.LazyGroup,
+    lazy_subcommands={
+        "users": ("slacktivate.cli.commands.users", "users_list"),
+    },
+)
 @click.pass_context
 def cli_list(ctx):
     """
@@ -136,10 +134,16 @@ def cli_list(ctx):
     pass
 
 
-list_users = cli_list.command(name="users")(slacktivate.cli.commands.users.users_list)
-
-
-@cli.group(name="users")
+@cli.group(
+    name="users",
+    cls=slacktivate.cli.helpers.LazyGroup,
+    lazy_subcommands={
+        "activate": ("slacktivate.cli.commands.users", "users_activate"),
+        "deactivate": ("slacktivate.cli.commands.users", "users_deactivate"),
+        "list": ("slacktivate.cli.commands.users", "users_list"),
+        "synchronize": ("slacktivate.cli.commands.users", "users_synchronize"),
+    },
+)
 @click.pass_context
 def cli_users(ctx):
     """
@@ -148,12 +152,15 @@ def cli_users(ctx):
     pass
 
 
-users_activate = cli_users.command(name="activate")(slacktivate.cli.commands.users.users_activate)
-users_deactivate = cli_users.command(name="deactivate")(slacktivate.cli.commands.users.users_deactivate)
-users_list = cli_users.command(name="list")(slacktivate.cli.commands.users.users_list)
-users_synchronize = cli_users.command(name="synchronize")(slacktivate.cli.commands.users.users_synchronize)
-
-@cli.group(name="channels")
+@cli.group(
+    name="channels",
+    cls=slacktivate.cli.helpers.LazyGroup,
+    lazy_subcommands={
+        # "deactivate": ("slacktivate.cli.commands.channels", "channels_deactivate"),
+        "list": ("slacktivate.cli.commands.channels", "channels_list"),
+        "ensure": ("slacktivate.cli.commands.channels", "channels_ensure"),
+    },
+)
 @click.pass_context
 def cli_channels(ctx):
     """
@@ -161,74 +168,23 @@ def cli_channels(ctx):
     """
     pass
 
-#channels_deactivate = cli_channels.command(name="deactivate")(slacktivate.cli.commands.channels.channels_deactivate)
-channels_list = cli_channels.command(name="list")(slacktivate.cli.commands.channels.channels_list)
-channels_ensure = cli_channels.command(name="ensure")(slacktivate.cli.commands.channels.channels_ensure)
 
-@cli.command()
-@slacktivate.cli.helpers.cli_arg_spec
-@click.pass_context
-def validate(
-        ctx: slacktivate.cli.helpers.AbstractSlacktivateCliContext,
-        spec: typing.Optional[io.BufferedReader]
-):
-    """
-    Validate the configuration file SPEC
-    """
-    if spec is not None:
-        ctx.obj.set_spec_file(spec_file=spec)
-
-    click.secho(
-        message="1. Attempting to parse configuration file \"{}\"...  ".format(ctx.obj.spec_filename),
-        nl=False,
-        err=True,
-    )
-    try:
-        with click_spinner.spinner():
-            sc = slacktivate.input.parsing.parse_specification(
-                contents=ctx.obj.spec_contents,
-                filename=ctx.obj.spec_filename,
-            )
-    except slacktivate.input.parsing.ParsingException or slacktivate.input.parsing.UserSourceException as exc:
-        click.secho("\nERROR: ", nl=False, err=True, fg="red", bold=True)
-        click.secho(exc.message, err=True, fg="red")
-        sys.exit(1)
-
-    except slacktivate.input.parsing.UserSourceException as exc:
-        click.secho("\nERROR: ", nl=False, err=True, fg="red", bold=True)
-        click.secho(exc.message, err=True, fg="red")
-        sys.exit(1)
-
-    click.secho("DONE!", nl=True, err=True, fg="green", bold=True)
-
-    click.secho(
-        message="2. Processing configuration file...  ",
-        nl=False,
-        err=True,
-    )
-
-    with click_spinner.spinner():
-        sc_obj = slacktivate.input.config.SlacktivateConfig(config_data=sc)
-
-    click.secho("DONE!", nl=True, err=True, fg="green", bold=True)
-
-    click.secho()
-    click.secho("Information:", err=True, bold=True)
-    click.secho("  Group definitions: {}".format(len(sc.get("groups", list()))), err=True)
-    click.secho("  Channel definitions: {}".format(len(sc.get("channels", list()))), err=True)
-    click.secho("  User source:", err=True)
-    for source in sc["users"]:
-        if "file" in source:
-            click.secho("  - {file} (type: '{type}')  ".format(**source), err=True)
-    click.secho()
-    click.secho("  User count: {}".format(len(sc_obj.users)))
-    click.secho("  Group count: {}".format(len(sc_obj.groups)))
-    click.secho("  Channel count: {}".format(len(sc_obj.channels)))
-
-    click.secho()
+# top-level commands implemented in their own module
+cli.lazy_subcommands.update({
+    "validate": ("slacktivate.cli.commands.validate", "validate"),
+})
 
 
 def main():
+    # answer a bare `--version` directly, without setting up the whole
+    # command tree (same output as click's version option)
+    if sys.argv[1:] == ["--version"]:
+        click.echo("{prog}, version {version}".format(
+            prog=os.path.basename(sys.argv[0]),
+            version=slacktivate.__version__,
+        ))
+        return sys.exit(0)
+
     return sys.exit(cli())
 
 
@@ -1,38 +1,13 @@
-import os
 import io
-import sys
-import textwrap
 import typing
 
 import click
-import click_help_colors
-import click_spinner
-import jinja2
-import loguru
 
-import slacktivate.__version__
 import slacktivate.cli.helpers
-import slacktivate.cli.logo
 import slacktivate.helpers.dict_serializer
-import slacktivate.input.config
-import slacktivate.input.parsing
-import slacktivate.macros.manage
-import slacktivate.macros.provision
-import slacktivate.slack.classes
-import slacktivate.slack.methods
 
 
-try:
-    import dotenv
-
-    if not dotenv.load_dotenv():
-        dotenv.load_dotenv(dotenv.find_dotenv())
-
-except ImportError:
-    raise
-
-
-logger = loguru.logger
+logger = slacktivate.cli.helpers.logger
 
 
 @slacktivate.cli.helpers.cli_arg_spec
@@ -49,32 +24,25 @@ def channels_list(
     if spec is not None:
         ctx.obj.set_spec_file(spec_file=spec)
 
-    with click_spinner.spinner(stream=sys.stderr):
-        sc_obj = slacktivate.input.config.SlacktivateConfig.from_specification(
-            config_data=ctx.obj.specification,
-        )
+    with slacktivate.cli.helpers.maybe_spinner():
+        sc_obj = ctx.obj.config
 
     format = format.lower()
 
+    channels = sc_obj.channels
+
     if format == "term":
-        click.echo("\n".join(list(map(lambda x: "{}".format(x), sc_obj.channels))))
+        click.echo("\n".join(map(str, channels)))
 
     elif format == "csv":
         
         # FIXME: this is not convincing
-        # NOTE: fix because comma can't (yet) handle missing fields
-        lst = list(map(slacktivate.helpers.dict_serializer.to_flat_dict, sc_obj.channels))
-        lst_ext = slacktivate.helpers.dict_serializer.add_missing_dict_fields(lst)
-
-        import comma
-        click.echo(comma.dumps(lst_ext))
+        slacktivate.cli.helpers.echo_csv(
+            records=list(map(slacktivate.helpers.dict_serializer.to_flat_dict, channels)),
+        )
 
     elif format == "json":
-        import json
-        click.echo(json.dumps(
-            obj=sc_obj.channels,
-            indent=4,
-        ))
+        slacktivate.cli.helpers.echo_json(channels)
 
 def _prep_ctx(
         ctx: slacktivate.cli.helpers.AbstractSlacktivateCliContext,
@@ -109,6 +77,8 @@ def channels_ensure(
     Ensures the existence of channels and the correctly provisioned
     membership of users in the channels.
     """
+    import slacktivate.macros.provision
+
     _prep_ctx(ctx=ctx, spec=spec, dry_run=dry_run)
 
     # MAIN EVENT
@@ -118,10 +88,9 @@ def channels_ensure(
         dry_run=ctx.obj.dry_run,
     )
 
-    import json
     if ctx.obj.dry_run:
-        logger.info("channels modifications: {}", json.dumps(channel_modifications, indent=2))
+        logger.info("channels modifications: {}", slacktivate.cli.helpers.dumps_json(channel_modifications))
     else:
-        logger.info("channels modified: {}", json.dumps(channel_modifications, indent=2))
+        logger.info("channels modified: {}", slacktivate.cli.helpers.dumps_json(channel_modifications))
 
     click.echo("DONE!")
\ No newline at end of file
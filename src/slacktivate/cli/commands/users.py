@@ -1,37 +1,13 @@
 import io
-import os
-import sys
-import textwrap
 import typing
 
 import click
-import click_help_colors
-import click_spinner
-import jinja2
-import loguru
 
-import slacktivate.__version__
 import slacktivate.cli.helpers
-import slacktivate.cli.logo
 import slacktivate.helpers.dict_serializer
-import slacktivate.input.config
-import slacktivate.input.parsing
-import slacktivate.macros.manage
-import slacktivate.macros.provision
-import slacktivate.slack.classes
-import slacktivate.slack.methods
 
-try:
-    import dotenv
 
-    if not dotenv.load_dotenv():
-        dotenv.load_dotenv(dotenv.find_dotenv())
-
-except ImportError:
-    raise
-
-
-logger = loguru.logger
+logger = slacktivate.cli.helpers.logger
 
 
 # TODO: implement the following
@@ -65,31 +41,28 @@ def users_list(
     if spec is not None:
         ctx.obj.set_spec_file(spec_file=spec)
 
-    with click_spinner.spinner(stream=sys.stderr):
-        sc_obj = slacktivate.input.config.SlacktivateConfig.from_specification(
-            config_data=ctx.obj.specification,
-        )
+    with slacktivate.cli.helpers.maybe_spinner():
+        sc_obj = ctx.obj.config
 
     format = format.lower()
 
-    if format == "term":
-        click.echo("\n".join(list(map(lambda x: "{}".format(x), sc_obj.users.keys()))))
+    users = sc_obj.users
 
-    elif format == "csv":
+    # nothing to flatten or serialize
+    if not users and format != "term":
+        click.echo("{}" if format == "json" else "")
+        return
 
-        # NOTE: fix because comma can't (yet) handle missing fields
-        lst = list(map(slacktivate.helpers.dict_serializer.to_flat_dict, sc_obj.users.values()))
-        lst_ext = slacktivate.helpers.dict_serializer.add_missing_dict_fields(lst)
+    if format == "term":
+        click.echo("\n".join(map(str, users)))
 
-        import comma
-        click.echo(comma.dumps(lst_ext))
+    elif format == "csv":
+        slacktivate.cli.helpers.echo_csv(
+            records=list(map(slacktivate.helpers.dict_serializer.to_flat_dict, users.values())),
+        )
 
     elif format == "json":
-        import json
-        click.echo(json.dumps(
-            obj=sc_obj.users,
-            indent=4,
-        ))
+        slacktivate.cli.helpers.echo_json(users)
 
 
 def _prep_ctx(
@@ -119,6 +92,8 @@ def users_activate(
     """
     Provide a list of all the users contained in SPEC.
     """
+    import slacktivate.macros.provision
+
     _prep_ctx(ctx=ctx, spec=spec, dry_run=dry_run)
 
     # MAIN EVENT
@@ -146,6 +121,8 @@ def users_synchronize(
     """
     Synchronize profile information and activation of users in SPEC.
     """
+    import slacktivate.macros.provision
+
     _prep_ctx(ctx=ctx, spec=spec, dry_run=dry_run)
 
     # MAIN EVENT
@@ -175,6 +152,8 @@ def users_deactivate(
     """
     Provide a list of all the users contained in SPEC.
     """
+    import slacktivate.macros.provision
+
     _prep_ctx(ctx=ctx, spec=spec, dry_run=dry_run)
 
     # MAIN EVENT
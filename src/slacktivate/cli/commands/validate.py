@@ -0,0 +1,77 @@
+import io
+import sys
+import typing
+
+import click
+
+import slacktivate.cli.helpers
+import slacktivate.input.parsing
+
+
+# shared default for optional specification sections (never mutated)
+_EMPTY_TUPLE = ()
+
+_USER_SOURCE_LINE = "  - {file} (type: '{type}')  "
+
+
+@slacktivate.cli.helpers.cli_arg_spec
+@click.pass_context
+def validate(
+        ctx: slacktivate.cli.helpers.AbstractSlacktivateCliContext,
+        spec: typing.Optional[io.BufferedReader]
+):
+    """
+    Validate the configuration file SPEC
+    """
+    if spec is not None:
+        ctx.obj.set_spec_file(spec_file=spec)
+
+    click.secho(
+        message="1. Attempting to parse configuration file \"{}\"...  ".format(ctx.obj.spec_filename),
+        nl=False,
+        err=True,
+    )
+    try:
+        with slacktivate.cli.helpers.maybe_spinner():
+            sc = ctx.obj.parse_specification()
+    except (slacktivate.input.parsing.ParsingException,
+            slacktivate.input.parsing.UserSourceException) as exc:
+        click.secho("\nERROR: ", nl=False, err=True, fg="red", bold=True)
+        click.secho(exc.message, err=True, fg="red")
+        sys.exit(1)
+
+    click.secho("DONE!", nl=True, err=True, fg="green", bold=True)
+
+    click.secho(
+        message="2. Processing configuration file...  ",
+        nl=False,
+        err=True,
+    )
+
+    with slacktivate.cli.helpers.maybe_spinner():
+        sc_obj = ctx.obj.config
+
+    click.secho("DONE!", nl=True, err=True, fg="green", bold=True)
+
+    # build the report first, and write each stream's part at once
+    info_lines = [
+        click.style("Information:", bold=True),
+        "  Group definitions: {}".format(len(sc.get("groups", _EMPTY_TUPLE))),
+        "  Channel definitions: {}".format(len(sc.get("channels", _EMPTY_TUPLE))),
+        "  User source:",
+    ]
+    for source in sc["users"]:
+        if "file" in source:
+            info_lines.append(_USER_SOURCE_LINE.format_map(source))
+
+    count_lines = [
+        "",
+        "  User count: {}".format(len(sc_obj.users)),
+        "  Group count: {}".format(len(sc_obj.groups)),
+        "  Channel count: {}".format(len(sc_obj.channels)),
+        "",
+    ]
+
+    click.echo()
+    click.echo("\n".join(info_lines), err=True)
+    click.echo("\n".join(count_lines))
@@ -1,42 +1,81 @@
 
 import code
+import collections.abc
+import contextlib
+import csv
+import functools
+import importlib
 import io
+import json
 import os
 import sys
+import time
 import typing
 
 import click
 import click_help_colors
 import click_spinner
-import loguru
-import slack
-import slack_scim
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import slacktivate.__version__
-import slacktivate.input.config
-import slacktivate.input.parsing
-import slacktivate.slack.clients
+import slacktivate.helpers.dotenv
+
+# the Slack clients and the specification parsing are slow to import, and
+# are only needed once a command runs (not for `--help` or usage errors),
+# so they are imported by the methods that use them
+if typing.TYPE_CHECKING:
+    import slack
+    import slack_scim
+    import slacktivate.input.config
+    import slacktivate.input.parsing
 
 
 __author__ = "Jérémie Lumbroso <lumbroso@cs.princeton.edu>"
 
 __all__ = [
     "launch_repl",
-    "chain_functions",
+    "echo_csv",
+    "dumps_json",
+    "echo_json",
+    "maybe_spinner",
 
     "SlacktivateCliContextObject",
     "AbstractSlacktivateCliContext",
+    "LazyGroup",
 
+    "cli_group_green",
     "cli_root_group_green",
     "cli_opt_token",
     "cli_opt_spec",
     "cli_opt_dry_run",
-
-    "cli_root",
+    "cli_arg_spec",
+    "cli_opt_version",
+    "cli_opt_output_format",
+    "OutputFormatType",
 ]
 
 
-logger = loguru.logger
+# how long (in seconds) a successful `auth.test` is trusted for a token
+AUTH_TEST_CACHE_TTL = 300
+
+# token -> (time of the `auth.test` call, team information it returned)
+_auth_test_cache: typing.Dict[str, typing.Tuple[float, typing.Any]] = dict()
+
+
+class _LazyLogger:
+    # loguru is only imported the first time the logger is actually used,
+    # so commands that do not log do not pay for its import
+
+    def __getattr__(self, name: str) -> typing.Any:
+        import loguru
+        return getattr(loguru.logger, name)
+
+
+logger = _LazyLogger()
 
 
 # From: https://medium.com/centrality/building-repls-for-fun-and-profit-597ae4fcdd85
@@ -50,7 +89,7 @@ def launch_repl(
     try:
         import IPython
         no_ipython = False
-    except ImportError or ModuleNotFoundError:
+    except ImportError:
         pass
 
     if no_ipython:
@@ -88,30 +127,86 @@ def launch_repl(
         print(footer)
 
 
-# From: https://stackoverflow.com/a/58005342/408734
-def chain_functions(*funcs: typing.List[typing.Callable]) -> typing.Callable:
+def echo_csv(
+        records: typing.List[typing.Dict[str, typing.Any]],
+        stream: typing.Optional[typing.TextIO] = None,
+) -> None:
+
+    # union of all the fields, in order of first appearance, since not
+    # every record defines every field (missing ones are left blank)
+    fields = dict()
+    for record in records:
+        fields.update(dict.fromkeys(record))
+
+    # a plain writer, since DictWriter re-checks each row's keys against
+    # the header, which is redundant when the header is the union of keys
+    writer = csv.writer(
+        stream if stream is not None else click.get_text_stream("stdout"),
+        lineterminator="\n",
+    )
+    writer.writerow(fields)
+    writer.writerows(
+        [record.get(field, "") for field in fields]
+        for record in records
+    )
+
+
+def _json_default(obj: typing.Any) -> typing.Any:
+    # configuration objects (such as ChannelConfig) are dict-like wrappers
+    if isinstance(obj, collections.abc.Mapping):
+        return dict(obj)
+    raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+
+# the encoder does not keep any state between calls, so one instance is
+# reused, rather than configuring a new one for each `json.dumps` call
+_json_encoder = json.JSONEncoder(default=_json_default, indent=2, ensure_ascii=False)
+
+
+def dumps_json(obj: typing.Any) -> str:
 
-    def _chain(*args, **kwargs):
-        cur_args, cur_kwargs = args, kwargs
-        ret = None
-        for f in reversed(funcs):
-            f = typing.cast(typing.Callable, f)
-            cur_args, cur_kwargs = (f(*cur_args, **cur_kwargs), ), {}
-            ret = cur_args[0]
-        return ret
+    # orjson (if installed) is much faster, and the standard library is
+    # configured to produce the exact same output otherwise
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2).decode("utf-8")
 
-    return _chain
+    return _json_encoder.encode(obj)
+
+
+def echo_json(
+        obj: typing.Any,
+        stream: typing.Optional[typing.TextIO] = None,
+) -> None:
+    click.echo(dumps_json(obj), file=stream)
+
+
+@contextlib.contextmanager
+def maybe_spinner(
+        stream: typing.Optional[typing.TextIO] = None,
+) -> typing.Iterator[None]:
+    stream = stream if stream is not None else sys.stderr
+
+    # the spinner runs in its own thread and is only useful to a person
+    # watching a terminal; skip it when piped or running in CI
+    if os.getenv("CI") or not stream.isatty():
+        yield
+        return
+
+    with click_spinner.spinner(stream=stream):
+        yield
 
 
 class SlacktivateCliContextObject:
 
+    _clients: typing.Optional[typing.Tuple["slack.WebClient", "slack_scim.SCIMClient"]] = None
     _dry_run: bool = False
     _slack_token: typing.Optional[str] = None
     _slack_token_last_used: typing.Optional[str] = None
-    _slacktivate_config: typing.Optional[slacktivate.input.config.SlacktivateConfig] = None
+    _slacktivate_config: typing.Optional["slacktivate.input.config.SlacktivateConfig"] = None
     _spec_file: typing.Optional[io.BufferedReader] = None
+    _spec_file_rewind: bool = False
     _spec_contents: typing.Optional[str] = None
-    _specification: typing.Optional[slacktivate.input.parsing.SlacktivateConfigSection] = None
+    _specification: typing.Optional["slacktivate.input.parsing.SlacktivateConfigSection"] = None
 
     def __init__(
             self,
@@ -132,30 +227,41 @@ class SlacktivateCliContextObject:
 
     def set_spec_file(self, spec_file: io.BufferedReader, no_rewind: bool = True):
         self._spec_file = spec_file
+        self._spec_file_rewind = not no_rewind
 
-        # cache content
-        if self._spec_file is not None:
-            if not no_rewind and self._spec_file.seekable():
+        # the contents are only read when first needed
+        self._spec_contents = None
+
+        # flush parsed specification and compiled configuration
+        self._specification = None
+        self._slacktivate_config = None
+
+    def _load_spec_contents(self) -> typing.Optional[str]:
+        if self._spec_contents is None and self._spec_file is not None:
+            if self._spec_file_rewind and self._spec_file.seekable():
                 self._spec_file.seek(0)
 
-            bin_content = self._spec_file.read()
-            try:
-                self._spec_contents = bin_content.decode("ascii")
-            except UnicodeDecodeError:
-                self._spec_contents = bin_content.decode("utf8")
+            # UTF-8 is a superset of ASCII, so a single decoding pass is
+            # enough (the "-sig" variant also drops a leading BOM if any)
+            self._spec_contents = self._spec_file.read().decode("utf-8-sig")
 
-            # flush parsed specification
-            self._specification = None
+        return self._spec_contents
 
     def activate_dry_run(self):
         if self._dry_run is None or not self._dry_run:
             self._dry_run = True
 
-    def compile_specification(self, silent=True, msg=None, **kwargs):
+    def compile_specification(self, silent=True, msg=None, force=False, parallel=False, **kwargs):
+        import slacktivate.input.config
+
+        # the configuration is only compiled once per specification file
+        if self._slacktivate_config is not None and not force:
+            return self._slacktivate_config
 
         def do_compile():
             self._slacktivate_config = slacktivate.input.config.SlacktivateConfig.from_specification(
                 config_data=self.specification,
+                parallel=parallel,
             )
 
         if silent:
@@ -171,48 +277,53 @@ class SlacktivateCliContextObject:
                     err=True,
                     **kwargs,
                 )
-            with click_spinner.spinner(stream=sys.stderr):
+            with maybe_spinner():
                 do_compile()
 
         return self._slacktivate_config
 
-    def login(self) -> typing.Tuple[slack.WebClient, slack_scim.SCIMClient]:
+    def parse_specification(self) -> typing.Optional["slacktivate.input.parsing.SlacktivateConfigSection"]:
+        import slacktivate.input.parsing
+
+        # the specification is only parsed once per specification file,
+        # but unlike the property, parsing errors are raised to the caller
+        if self._specification is None and self._load_spec_contents() is not None:
+            self._specification = slacktivate.input.parsing.parse_specification(
+                contents=self._spec_contents,
+                filename=self.spec_filename,
+            )
+
+        return self._specification
+
+    def login(self) -> typing.Tuple["slack.WebClient", "slack_scim.SCIMClient"]:
+        import slacktivate.slack.clients
+
         logger.debug("CLI: entering login() method")
 
-        # 1. by default use environment variable
-        slack_token = os.getenv("SLACK_TOKEN")
-        logger.debug("CLI: 1. env variable? SLACK_TOKEN={}", slack_token)
+        # the environment (including any .env file lying around) may be
+        # overridden by the specification, which may itself be overridden
+        # by the command line arg
+        slacktivate.helpers.dotenv.load_dotenv_once()
 
-        # trying again with .env file lying around
-        try:
-            import dotenv
-            if not dotenv.load_dotenv():
-                dotenv.load_dotenv(dotenv.find_dotenv())
-        except ImportError:
-            pass
-
-        # 2. may be overriden by .env variable
-        slack_token = os.getenv("SLACK_TOKEN") if os.getenv("SLACK_TOKEN") is not None else slack_token
-        logger.debug("CLI: 2. load .env? SLACK_TOKEN={}", slack_token)
-
-        # 3. may be overriden by specification.yaml setting
-        if self._specification is not None:
-            settings_slack_token = self._specification.get("settings", dict()).get("slack_token")
-            slack_token = settings_slack_token if settings_slack_token is not None else slack_token
-            logger.debug("CLI: 3. specification.yaml? SLACK_TOKEN={}", slack_token)
-
-        # 4. may be overriden by the command line arg
-        slack_token = self._slack_token if self._slack_token is not None else slack_token
-        logger.debug("CLI: 4. cmd line? SLACK_TOKEN={}", slack_token)
+        slack_token = self._slack_token
+        if slack_token is None and self._specification is not None:
+            slack_token = self._specification.get("settings", dict()).get("slack_token")
+        if slack_token is None:
+            slack_token = os.environ.get("SLACK_TOKEN")
 
         logger.debug("CLI: concluding with SLACK_TOKEN={}", slack_token)
+
+        # already logged in with this token
+        if self._clients is not None and slack_token == self._slack_token_last_used:
+            return self._clients
+
         self._slack_token_last_used = slack_token
 
         # Update internally
-        if slack_token is not None:
+        if slack_token is not None and os.environ.get("SLACK_TOKEN") != slack_token:
             logger.debug("CLI: exporting SLACK_TOKEN={}", slack_token)
-            os.environ["SLACK_TOKEN"] = self._slack_token_last_used
-        
+            os.environ["SLACK_TOKEN"] = slack_token
+
         slacktivate.slack.clients.SLACK_TOKEN = self._slack_token_last_used
 
         clients = slacktivate.slack.clients.login(
@@ -223,11 +334,17 @@ class SlacktivateCliContextObject:
 
         # verify workspace
         team_info = None
-        try:
-            team_info = clients[0].auth_test()
-        except Exception as exc:
-            logger.error("CLI: failed to login to Slack: {}", exc)
-            pass
+        cached_team_info = _auth_test_cache.get(slack_token)
+        if cached_team_info is not None and time.monotonic() - cached_team_info[0] < AUTH_TEST_CACHE_TTL:
+            logger.debug("CLI: reusing recent auth.test for SLACK_TOKEN={}", slack_token)
+            team_info = cached_team_info[1]
+        else:
+            try:
+                team_info = clients[0].auth_test()
+                _auth_test_cache[slack_token] = (time.monotonic(), team_info)
+            except Exception as exc:
+                logger.error("CLI: failed to login to Slack: {}", exc)
+                pass
         
         if team_info is not None and team_info.get("url") is not None:
             team_url = team_info.get("url").lower().strip("/")
@@ -250,10 +367,12 @@ class SlacktivateCliContextObject:
         else:
             logger.debug("CLI: failed to login to Slack")
 
+        self._clients = clients
+
         return clients
 
     @property
-    def config(self) -> slacktivate.input.config.SlacktivateConfig:
+    def config(self) -> "slacktivate.input.config.SlacktivateConfig":
         if self._slacktivate_config is None:
             self.compile_specification(
                 silent=True,
@@ -276,21 +395,16 @@ class SlacktivateCliContextObject:
 
     @property
     def spec_contents(self) -> typing.Optional[str]:
-        return self._spec_contents
+        return self._load_spec_contents()
 
     @property
-    def specification(self) -> typing.Optional[slacktivate.input.parsing.SlacktivateConfigSection]:
-        if self._spec_contents is not None and self._specification is None:
-            try:
-                self._specification = slacktivate.input.parsing.parse_specification(
-                    contents=self._spec_contents,
-                    filename=self.spec_filename,
-                )
-            except slacktivate.input.parsing.ParsingException:
-                return
+    def specification(self) -> typing.Optional["slacktivate.input.parsing.SlacktivateConfigSection"]:
+        import slacktivate.input.parsing
 
-        if self._specification is not None:
-            return self._specification
+        try:
+            return self.parse_specification()
+        except slacktivate.input.parsing.ParsingException:
+            return
 
 
 class AbstractSlacktivateCliContext:
@@ -310,12 +424,76 @@ class AbstractSlacktivateCliContext:
         self._ctx_obj = value
 
 
-cli_root_group_green = click.group(
+# colors of the help of all the groups and commands
+_HELP_HEADERS_COLOR = "bright_green"
+_HELP_OPTIONS_COLOR = "green"
+
+
+@functools.lru_cache(maxsize=None)
+def _as_command(func: typing.Callable) -> click.Command:
+    # click consumes the parameters attached to a function when it is made
+    # into a command, so a function shared by several groups (such as
+    # "list users" and "users list") must only ever be converted once; the
+    # commands are colored like the groups (see `cli_group_green`)
+    return click.command(
+        cls=click_help_colors.HelpColorsCommand,
+        help_headers_color=_HELP_HEADERS_COLOR,
+        help_options_color=_HELP_OPTIONS_COLOR,
+    )(func)
+
+
+class LazyGroup(click_help_colors.HelpColorsGroup):
+    """
+    A (colored) :py:class:`click.Group` whose subcommands are only imported when they
+    are invoked (or when the help is displayed), so that running one command
+    does not require loading the modules of all the others.
+    """
+
+    def __init__(
+            self,
+            *args,
+            lazy_subcommands: typing.Optional[typing.Dict[str, typing.Tuple[str, str]]] = None,
+            **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+
+        # maps a command name to a (module name, attribute name) pair
+        self.lazy_subcommands = lazy_subcommands or dict()
+
+    def make_context(self, info_name, args, parent=None, **extra) -> click.Context:
+        # the options may be read from the environment, so it must be
+        # completed with any .env file before they are parsed
+        slacktivate.helpers.dotenv.load_dotenv_once()
+        return super().make_context(info_name, args, parent=parent, **extra)
+
+    def list_commands(self, ctx: click.Context) -> typing.List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> typing.Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            (module_name, attr_name) = self.lazy_subcommands[cmd_name]
+            obj = getattr(importlib.import_module(module_name), attr_name)
+            if not isinstance(obj, click.Command):
+                obj = _as_command(obj)
+            self.add_command(obj, name=cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+
+# the colors are passed down by HelpColorsGroup to the groups created from it
+cli_group_green = functools.partial(
+    click.group,
     cls=click_help_colors.HelpColorsGroup,
-    help_headers_color='bright_green',
-    help_options_color='green'
+    help_headers_color=_HELP_HEADERS_COLOR,
+    help_options_color=_HELP_OPTIONS_COLOR,
 )
 
+cli_root_group_green = cli_group_green(cls=LazyGroup)
+
+# parameter types are stateless, so a single instance is shared by all
+# the options and arguments that read a specification file
+_SPEC_FILE_TYPE = click.File("rb")
+
 cli_opt_token = click.option(
     "--token",
     metavar="$SLACK_TOKEN",
@@ -324,14 +502,14 @@ cli_opt_token = click.option(
 
 cli_opt_spec = click.option(
     "--spec",
-    type=click.File("rb"),
+    type=_SPEC_FILE_TYPE,
     default="specification.yaml", envvar="SLACKTIVATE_SPEC", metavar="SPEC",
     help="Provide the specification for the Slack workspace."
 )
 
 cli_arg_spec = click.argument(
     "spec",
-    type=click.File('rb'),
+    type=_SPEC_FILE_TYPE,
     default=None, envvar="SLACKTIVATE_CONFIG", metavar="SPEC", required=False,
 )
 
@@ -355,11 +533,3 @@ cli_opt_output_format = click.option(
     default="term", metavar="FORMAT",
     help="Output format (e.g.: term, json, csv, ...)"
 )
-
-
-cli_root = chain_functions(*[
-    cli_root_group_green,
-    cli_opt_token, cli_opt_spec, cli_opt_dry_run, cli_opt_version,
-    click.pass_context,
-])
-
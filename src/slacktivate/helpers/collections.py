@@ -1,4 +1,5 @@
 
+import collections.abc
 import typing
 
 
@@ -26,20 +27,18 @@ def first_or_none(
     :return: The first element if it can be extracted, otherwise ``None``
     """
 
-    # let's try as a list-like object first
-    try:
-        if lst is None or len(lst) == 0:
-            return
-        return lst[0]
-    except TypeError:
-        # - will be thrown if len(X) on an object that can't provide a length
-        # - will be thrown if X[0] on an object that can't be subscripted
-        pass
+    if lst is None:
+        return
 
-    # let's try as an iterator
+    # list-like objects can be subscripted directly
+    if isinstance(lst, collections.abc.Sequence):
+        return lst[0] if len(lst) > 0 else None
+
+    # otherwise, let's try as an iterator
     try:
-        for item in lst:
-            return item
+        iterator = iter(lst)
     except TypeError:
-        # - will throw an exception if X is not iterable
+        # not iterable
         return
+
+    return next(iterator, None)
@@ -8,35 +8,75 @@ __all__ = [
     "to_dict",
     "to_flat_dict",
     "dict_to_flat_dict",
+    "add_missing_dict_fields",
 ]
 
 
-_ELEMENTARY_TYPE: typing.List[typing.Type] = [int, str, float, bool, type(None)]
+_ELEMENTARY_TYPE: typing.Tuple[typing.Type, ...] = (int, str, float, bool, type(None))
+
+# types that `to_dict` does not need to unwrap into their attributes
+_UNWRAPPED_TYPE: typing.Tuple[typing.Type, ...] = _ELEMENTARY_TYPE + (list, dict)
+
+# exact types of the values that are kept as-is, which are most of the values
+# and are recognized with a single set lookup (subclasses are still handled
+# by the slower path)
+_KEPT_TYPE: typing.FrozenSet[typing.Type] = frozenset(_ELEMENTARY_TYPE + (list,))
 
 
 def _is_elementary_type(obj: typing.Any) -> bool:
-    for typ in _ELEMENTARY_TYPE:
-        if issubclass(type(obj), typ):
-            return True
-    return False
+    return isinstance(obj, _ELEMENTARY_TYPE)
+
+
+def _unwrap_object(obj: typing.Any) -> typing.Any:
+    # replace arbitrary objects by their attributes, until reaching
+    # a value that is serialized as-is or a dictionary to walk
+    while not isinstance(obj, _UNWRAPPED_TYPE):
+        obj = obj.__dict__
+    return obj
 
 
 def to_dict(
         obj: typing.Any
 ) -> typing.Union[typing.List, typing.Dict[str, typing.Any]]:
-    if _is_elementary_type(obj):
-        return obj
+    obj = _unwrap_object(obj)
 
-    if isinstance(obj, list):
+    if not isinstance(obj, dict):
         return obj
 
-    if isinstance(obj, dict):
-        return {
-            key: to_dict(value)
-            for (key, value) in obj.items()
-        }
+    # walk nested dictionaries depth-first with an explicit stack (of the
+    # items iterators of the dictionaries being walked), rather than
+    # recursively, so that deep structures cannot exhaust the call stack
+    result = dict()
+    stack = [(result, iter(obj.items()), id(obj))]
+
+    # the dictionaries being walked, to detect (rather than endlessly
+    # follow) a dictionary that contains itself
+    walking = {id(obj)}
+
+    while stack:
+        (target, items, source_id) = stack[-1]
+
+        for (key, value) in items:
+            if type(value) not in _KEPT_TYPE:
+                value = _unwrap_object(value)
+
+                if isinstance(value, dict):
+                    if id(value) in walking:
+                        raise ValueError("Circular reference detected")
 
-    return to_dict(obj.__dict__)
+                    target[key] = dict()
+                    walking.add(id(value))
+                    stack.append((target[key], iter(value.items()), id(value)))
+                    break
+
+            target[key] = value
+
+        else:
+            # this dictionary is exhausted
+            stack.pop()
+            walking.discard(source_id)
+
+    return result
 
 
 def dict_to_flat_dict(
@@ -45,28 +85,33 @@ def dict_to_flat_dict(
 
     result = dict()
 
-    def _aux(
-            dict_obj: typing.Dict[str, typing.Any],
-            prefix: typing.Optional[str] = None,
-    ) -> typing.NoReturn:
-        prefix = prefix if prefix is not None else ""
+    # depth-first walk, with a stack of the (prefix, items iterator) of the
+    # dictionaries being visited, so that leaves are in their original order
+    stack = [(None, iter(dict_obj.items()), id(dict_obj))]
+
+    # the dictionaries being visited (see `to_dict`)
+    walking = {id(dict_obj)}
 
-        for (key, value) in dict_obj.items():
-            path ="{prefix}.{key}".format(
-                prefix=prefix,
-                key=key,
-            ).strip(".")
+    while stack:
+        (prefix, items, source_id) = stack[-1]
+
+        for (key, value) in items:
+            path = str(key) if not prefix else prefix + "." + str(key)
 
             if isinstance(value, dict):
-                _aux(
-                    dict_obj=value,
-                    prefix=path,
-                )
+                if id(value) in walking:
+                    raise ValueError("Circular reference detected")
+
+                walking.add(id(value))
+                stack.append((path, iter(value.items()), id(value)))
+                break
 
-            else:
-                result[path] = value
+            result[path] = value
 
-    _aux(dict_obj=dict_obj)
+        else:
+            # this dictionary is exhausted
+            stack.pop()
+            walking.discard(source_id)
 
     return result
 
@@ -81,19 +126,18 @@ def add_missing_dict_fields(
         list_of_dicts: typing.List[typing.Dict[typing.Any, typing.Any]],
 ) -> typing.List[typing.Dict[typing.Any, typing.Any]]:
 
-    fields = list()
-
+    # union of the fields, in order of first appearance (a dict is used
+    # as an ordered set, so that membership tests are constant-time)
+    fields = dict()
     for d in list_of_dicts:
-        for field in d.keys():
-            if field in fields:
-                continue
-            fields.append(field)
+        fields.update(dict.fromkeys(d))
+
+    # each row starts from a blank record with all the fields (in order),
+    # which is then merged with the fields actually present
+    empty_dict = dict.fromkeys(fields, "")
 
     list_of_dicts_with_missing_fields = [
-        {
-            field: d.get(field, "")
-            for field in fields
-        }
+        {**empty_dict, **d}
         for d in list_of_dicts
     ]
 
@@ -0,0 +1,40 @@
+import functools
+import os
+
+
+__author__ = "Jérémie Lumbroso <lumbroso@cs.princeton.edu>"
+
+__all__ = [
+    "load_dotenv_once",
+]
+
+
+@functools.lru_cache(maxsize=1)
+def load_dotenv_once() -> bool:
+    """
+    Loads the variables of the nearest ``.env`` file (searching from the working
+    directory upwards) into the environment, at most once per process. This can
+    be disabled by setting the environment variable ``SLACKTIVATE_NO_DOTENV=1``.
+
+    :return: ``True`` if a ``.env`` file was loaded, ``False`` otherwise
+    """
+
+    # allow opting out, when the environment is already fully set up
+    if os.getenv("SLACKTIVATE_NO_DOTENV") == "1":
+        return False
+
+    try:
+        import dotenv
+    except ImportError:
+        return False
+
+    # a .env file in the working directory is the common case, and only
+    # costs one stat; otherwise look for one in the parent directories
+    if os.path.isfile(".env"):
+        return dotenv.load_dotenv(".env")
+
+    dotenv_path = dotenv.find_dotenv(usecwd=True)
+    if not dotenv_path:
+        return False
+
+    return dotenv.load_dotenv(dotenv_path)
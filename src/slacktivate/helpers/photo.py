@@ -57,12 +57,31 @@ whether a profile contains an anonymous image.
 
 ANONYMOUS_AVATAR_IMAGE = PIL.Image.open(io.BytesIO(ANONYMOUS_AVATAR_BINARY_DATA))
 
+# decode the image once, at import, rather than on its first comparison
+ANONYMOUS_AVATAR_IMAGE.load()
+
+
+# connections are pooled (and kept alive) across the images requested
+_requests_session = requests.Session()
+
+
+# the images downloaded successfully, by URL, as the same (directory) image
+# is often compared against many profiles; they are never modified in place
+_IMAGE_CACHE_SIZE = 256
+_image_cache: typing.Dict[str, PIL.Image.Image] = dict()
+
 
 # noinspection PyBroadException
 def _request_image(image_url: str) -> typing.Optional[PIL.Image.Image]:
+    img = _image_cache.get(image_url)
+    if img is not None:
+        return img
+
+    # NOTE: failures are not cached, as they may only be temporary (a
+    # timeout, rate limiting, ...), and the URL is tried again next time
     data = None
     try:
-        r = requests.get(image_url)
+        r = _requests_session.get(image_url)
         if r.ok:
             data = r.content
     except:
@@ -73,6 +92,11 @@ def _request_image(image_url: str) -> typing.Optional[PIL.Image.Image]:
 
     img = PIL.Image.open(io.BytesIO(data))
 
+    # drop the oldest image when the cache is full
+    if len(_image_cache) >= _IMAGE_CACHE_SIZE:
+        del _image_cache[next(iter(_image_cache))]
+    _image_cache[image_url] = img
+
     return img
 
 
@@ -90,67 +114,47 @@ def _quantize_color(img, color=None, distance=1):
     if color is None:
         color = PIL.ImageColor.getcolor("white", "RGB")
 
-    def pixdist(xcoord: int, ycoord: int):
-        pixcolor = img.getpixel((xcoord, ycoord))
-        return sum(map(abs, map(sum, zip(pixcolor, map(lambda v: -v, color)))))
-
-    x = 0
-    dx = 1
-    while x < img.width:
-
-        changed_pixels = 0
-
-        y = 0
-        dy = 1
-        while y < img.height:
-            if pixdist(x, y) > distance:
-                break
-            img.putpixel((x,y), color)
-            changed_pixels += 1
-            y += dy
-
-        y = img.height - 1
-        dy = -1
-        while y >= 0:
-            if pixdist(x, y) > distance:
-                break
-            img.putpixel((x,y), color)
-            changed_pixels += 1
-            y += dy
-
-        if changed_pixels == 0:
-            break
+    # map of the pixels within `distance` of `color` (sum of the absolute
+    # differences of the channels), computed once for the whole image: it
+    # does not change as the border is flooded, since only pixels that are
+    # already close to `color` are overwritten
+    diff = PIL.ImageChops.difference(img, PIL.Image.new("RGB", img.size, color))
+    if distance < 255:
+        near = diff.convert("L", matrix=(1, 1, 1, 0)).point(
+            lambda level: 255 if level <= distance else 0
+        )
+    else:
+        # the sum of the channels would saturate in a grayscale image
+        near = PIL.Image.new("L", img.size)
+        near.putdata([255 if sum(pixcolor) <= distance else 0 for pixcolor in diff.getdata()])
+    near = near.tobytes()
+
+    (width, height) = img.size
+
+    def flood_column(xcoord: int) -> int:
+        column = near[xcoord::width]
+
+        # length of the runs of close pixels from the top and the bottom
+        top = column.find(0)
+        top = height if top == -1 else top
+        bottom = height - 1 - column.rfind(0)
+
+        if top > 0:
+            img.paste(color, (xcoord, 0, xcoord + 1, top))
+        if bottom > 0:
+            img.paste(color, (xcoord, height - bottom, xcoord + 1, height))
 
-        x += dx
-
-    x = img.width - 1
-    dx = -1
-    while x >= 0:
-
-        changed_pixels = 0
-
-        y = 0
-        dy = 1
-        while y < img.height:
-            if pixdist(x, y) > distance:
-                break
-            img.putpixel((x,y), color)
-            changed_pixels += 1
-            y += dy
-
-        y = img.height - 1
-        dy = -1
-        while y >= 0:
-            if pixdist(x, y) > distance:
-                break
-            img.putpixel((x,y), color)
-            changed_pixels += 1
-            y += dy
-
-        if changed_pixels == 0:
+        return top + bottom
+
+    # flood the columns from the left, then from the right, until reaching
+    # a column whose top and bottom pixels are both far from `color`
+    for x in range(width):
+        if flood_column(x) == 0:
             break
 
-        x += dx
+    for x in reversed(range(width)):
+        if flood_column(x) == 0:
+            break
 
     return img
 
@@ -204,48 +208,36 @@ def _resize_image_pair(
 def _is_image_empty(img, threshold=0, proportion=None):
     img = img.convert("L")
 
-    pixels_total = img.width * img.height
-    pixels_below_threshold = 0
+    # the image is empty if even its brightest pixel is within the threshold
+    if proportion is None:
+        (_, brightest_level) = img.getextrema()
+        return brightest_level <= threshold
 
-    for x in range(img.width):
-        for y in range(img.height):
-            if img.getpixel((x,y)) > threshold:
-                if proportion is None:
-                    return False
-            else:
-                pixels_below_threshold += 1
+    # count the pixels from the histogram of gray levels, which PIL
+    # computes in a single pass, rather than visiting each pixel
+    histogram = img.histogram()
 
-    if proportion is None:
-        return pixels_below_threshold == pixels_total
+    pixels_total = img.width * img.height
+    pixels_below_threshold = sum(
+        count
+        for (level, count) in enumerate(histogram)
+        if level <= threshold
+    )
 
     proportion_below_threshold = (float(pixels_below_threshold)/float(pixels_total)) * 100.0
 
     return proportion_below_threshold >= proportion
 
 
-def _binarize_image(
-        img: PIL.Image.Image,
-        threshold: float
-) -> PIL.Image.Image:
-    output = img.convert("L")
-    for x in range(output.width):
-        for y in range(output.height):
-            output.putpixel(
-                xy=(x, y),
-                value=0 if output.getpixel((x,y)) < threshold else 255,
-            )
-    return output
-
-
 def is_image_anonymous(img):
     try:
         img_comb = PIL.ImageChops.difference(ANONYMOUS_AVATAR_IMAGE, img)
     except:
         return False
 
-    img_bin = _binarize_image(img=img_comb, threshold=45.0)
-
-    return _is_image_empty(img_bin, threshold=30, proportion=99.9)
+    # binarizing the difference (gray levels below 45 become black), to then
+    # count the black pixels, is the same as counting the levels up to 44
+    return _is_image_empty(img_comb, threshold=44, proportion=99.9)
 
 
 def is_image_likely_identical(img1, img2):
@@ -281,7 +273,7 @@ def detect_profile_image_type(
 
     if type(directory_img) is str:
         # could be an URL
-        if "http" in directory_img:
+        if directory_img.startswith(("http://", "https://")):
             directory_img = _request_image(image_url=directory_img)
         else:
             # or base64 encoded image: TO implement
@@ -1,7 +1,8 @@
 
+import concurrent.futures
 import copy
+import csv
 import os
-import io
 import typing
 
 import slacktivate.input.helpers
@@ -35,16 +36,28 @@ ALL_SETTINGS: typing.List[str] = [
 ]
 
 
+# spellings of the boolean settings (the specification is loaded with all
+# scalars as strings)
+_SETTING_BOOLEAN_VALUES: typing.Dict[str, bool] = {
+    "true": True,
+    "false": False,
+    "yes": True,
+    "no": False,
+}
+
+
 class SlacktivateConfig:
 
     _config: slacktivate.input.parsing.SlacktivateConfigSection = None
     _users: typing.Dict[str, typing.Dict] = None
     _groups: typing.List[slacktivate.input.parsing.UserGroupConfig] = None
     _channels: typing.List[slacktivate.input.parsing.ChannelConfig] = None
+    _copies: typing.Optional[typing.Dict[str, typing.Any]] = None
 
     def __init__(
             self,
             config_data: slacktivate.input.parsing.SlacktivateConfigSection,
+            parallel: bool = False,
     ):
         if config_data is None:
             raise ValueError("`config_data` not supposed to be None")
@@ -57,65 +70,84 @@ class SlacktivateConfig:
 
         self._alternate_emails = {}
 
+        settings = self._config.get("settings", dict())
+
         # Parsing booleans?
-        for (key, value) in self._config.get("settings", dict()).items():
-            if not type(value) is str:
+        for (key, value) in settings.items():
+            if not isinstance(value, str):
                 continue
-            value = value.lower()
-            if value == "true":
-                self._config["settings"][key] = True
-            if value == "false":
-                self._config["settings"][key] = False
+            parsed_value = _SETTING_BOOLEAN_VALUES.get(value.strip().lower())
+            if parsed_value is not None:
+                settings[key] = parsed_value
 
-        if "alternate_emails" in self._config.get("settings", dict()):
+        if "alternate_emails" in settings:
 
-            lines = None
+            rows = None
 
-            alternate_emails_src = self._config.get("settings").get("alternate_emails")
+            # each row lists the emails of one user, separated by commas
+            alternate_emails_src = settings.get("alternate_emails")
             if os.path.exists(alternate_emails_src):
-                lines = open(alternate_emails_src).read().strip().splitlines(keepends=False)
+                with open(alternate_emails_src, newline="") as f:
+                    rows = list(csv.reader(f))
             elif "\n" in alternate_emails_src:
-                lines = alternate_emails_src.strip().splitlines()
+                rows = list(csv.reader(alternate_emails_src.strip().splitlines()))
 
-            if lines is not None:
-                lst_of_emails = list(map(lambda s: s.split(","), lines))
-                dict_of_emails = {
+            if rows is not None:
+                self._alternate_emails = {
                     email: email_row
-                    for email_row in lst_of_emails
+                    for email_row in rows
                     for email in email_row
                 }
-                self._alternate_emails = dict_of_emails
 
-        for userconfig in self._config.get("users"):
-            userconfig = typing.cast(slacktivate.input.parsing.UserSourceConfig, userconfig)
-            users = userconfig.load(vars=self._vars, alternate_emails=self._alternate_emails)
+        userconfigs = typing.cast(
+            typing.List[slacktivate.input.parsing.UserSourceConfig],
+            self._config.get("users"),
+        )
+
+        if parallel and len(userconfigs) > 1:
+            # user sources are independent, and rendering their records is
+            # CPU-bound, so each can be loaded in its own process
+            with concurrent.futures.ProcessPoolExecutor() as executor:
+                futures = [
+                    executor.submit(
+                        userconfig.load,
+                        vars=self._vars,
+                        alternate_emails=self._alternate_emails,
+                    )
+                    for userconfig in userconfigs
+                ]
+                loaded_user_sources = [future.result() for future in futures]
+        else:
+            loaded_user_sources = (
+                userconfig.load(vars=self._vars, alternate_emails=self._alternate_emails)
+                for userconfig in userconfigs
+            )
+
+        # merging each source with the data of the previous ones
+        merged_users = self._users
 
-            # merging with existing data
+        for users in loaded_user_sources:
 
-            old_users = self._users
             new_users = slacktivate.input.helpers.reindex_user_data(
                 user_data=users,
             )
 
             for (key, user) in new_users.items():
+                old_user = merged_users.get(key)
 
-                # new user, easy
-                if key not in old_users:
-                    old_users[key] = user
+                # new user (or nothing to merge), easy
+                if not old_user:
+                    merged_users[key] = user
+                    continue
+
+                if not user:
                     continue
 
                 # existing user, need to merge carefully
-                combined_user = slacktivate.input.helpers.merge_dict(
-                    src=old_users[key],
+                merged_users[key] = slacktivate.input.helpers.merge_dict(
+                    src=old_user,
                     dest=user,
                 )
-                old_users[key] = combined_user
-
-            self._users = old_users
-
-            # self._users.update(slacktivate.input.helpers.reindex_user_data(
-            #     user_data=users,
-            # ))
 
         self._groups = []
 
@@ -139,10 +171,11 @@ class SlacktivateConfig:
     @classmethod
     def from_specification(
             cls,
-            stream: typing.Optional[io.TextIOBase] = None,
+            stream: typing.Optional[typing.IO] = None,
             filename: typing.Optional[str] = None,
             contents: typing.Optional[str] = None,
             config_data: typing.Optional[slacktivate.input.parsing.SlacktivateConfigSection] = None,
+            parallel: bool = False,
     ):
         if stream is not None or filename is not None or contents is not None:
             config_data = slacktivate.input.parsing.parse_specification(
@@ -154,20 +187,31 @@ class SlacktivateConfig:
         if config_data is None:
             return
 
-        return cls(config_data=config_data)
+        return cls(config_data=config_data, parallel=parallel)
+
+    # the properties below return copies of the configuration, so that callers
+    # cannot modify it; as the synchronization macros read them once per user,
+    # each copy is made on first access and then shared by all the callers
+
+    def _cached_copy(self, name: str, value: typing.Any) -> typing.Any:
+        if self._copies is None:
+            self._copies = dict()
+        if name not in self._copies:
+            self._copies[name] = copy.deepcopy(value)
+        return self._copies[name]
 
     @property
     def users(self) -> typing.Dict[str, typing.Dict]:
-        return copy.deepcopy(self._users)
+        return self._cached_copy("users", self._users)
 
     @property
     def groups(self) -> typing.List[slacktivate.input.parsing.UserGroupConfig]:
-        return copy.deepcopy(self._groups)
+        return self._cached_copy("groups", self._groups)
 
     @property
     def channels(self) -> typing.List[slacktivate.input.parsing.ChannelConfig]:
-        return copy.deepcopy(self._channels)
+        return self._cached_copy("channels", self._channels)
 
     @property
     def settings(self) -> typing.Dict[str, typing.Any]:
-        return copy.deepcopy(self._config.get("settings", dict()))
+        return self._cached_copy("settings", self._config.get("settings", dict()))
@@ -1,11 +1,12 @@
 
 import collections
 import copy
+import functools
+import re
 import typing
 
 import jinja2
-import yaql
-import yaql.language.exceptions
+import jinja2.meta
 
 
 __author__ = "Jérémie Lumbroso <lumbroso@cs.princeton.edu>"
@@ -18,21 +19,111 @@ __all__ = [
 ]
 
 
+class _JinjaBytecodeCache(jinja2.FileSystemBytecodeCache):
+    # the cache is only an optimization, so failing to write to it is ignored
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def _make_jinja2_bytecode_cache() -> typing.Optional[jinja2.BytecodeCache]:
+    # a private, per-user directory in the temporary directory (created by
+    # jinja2, which refuses to use it if it is not safe)
+    try:
+        return _JinjaBytecodeCache()
+    except (OSError, RuntimeError):
+        return None
+
+
+# the same few patterns (keys, names, fields) are rendered for every record,
+# so templates are compiled once per distinct pattern, in a shared environment;
+# the patterns are loaded by "name" (the name being the pattern itself), so
+# that their compiled code is also kept on disk from one run to the next
+_jinja2_environment = jinja2.Environment(
+    loader=jinja2.FunctionLoader(lambda jinja2_pattern: (jinja2_pattern, None, lambda: True)),
+    bytecode_cache=_make_jinja2_bytecode_cache(),
+    auto_reload=False,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_jinja2(jinja2_pattern: str) -> jinja2.Template:
+    return _jinja2_environment.get_template(jinja2_pattern)
+
+
+# a pattern that only outputs one top-level variable, such as "{{ email }}"
+_JINJA2_SINGLE_VARIABLE_REGEX = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_jinja2_renderer(jinja2_pattern: str) -> typing.Callable[[dict], str]:
+    # a function rendering the pattern with a context (see `jinja2_context`);
+    # the most common patterns, which only output one variable, are rendered
+    # with a lookup in the context rather than by running the template
+
+    render_template = compile_jinja2(jinja2_pattern).render
+
+    match = _JINJA2_SINGLE_VARIABLE_REGEX.fullmatch(jinja2_pattern)
+    if match is None:
+        return render_template
+
+    variable = match.group(1)
+
+    def render(context: dict) -> str:
+        # the template is still used for the variables which are not in the
+        # context (undefined, or one of the globals of the environment)
+        if variable in context:
+            return str(context[variable])
+        return render_template(context)
+
+    return render
+
+
+@functools.lru_cache(maxsize=1)
+def _yaql_engine() -> typing.Callable:
+    # building the engine (and its grammar) is expensive, so it is shared;
+    # yaql itself is slow to import, so it is only imported when first needed
+    import yaql
+    return yaql.factory.YaqlFactory().create()
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_yaql(query: str) -> typing.Any:
+    # parsed expressions do not hold any state, and can be evaluated repeatedly
+    return _yaql_engine()(query)
+
+
+# exact types that `flatten` always (or never) descends into
+_FLATTENED_TYPE: typing.FrozenSet[typing.Type] = frozenset((list, tuple, set, frozenset))
+_ATOMIC_TYPE: typing.FrozenSet[typing.Type] = frozenset((str, bytes, int, float, bool, type(None)))
+
+
 def flatten(
         lst: typing.Iterable,
         as_generator: bool = False
 ) -> typing.Union[typing.Generator, typing.List]:
 
-    # from: https://stackoverflow.com/a/2158532/408734
+    # depth-first walk, with a stack of the iterators of the nested
+    # iterables being visited, rather than one generator per level
     def _flatten_aux(lst: typing.Iterable):
-        for x in lst:
-            if (
-                    isinstance(x, collections.abc.Iterable) and
-                    not isinstance(x, (str, bytes))
-            ):
-                yield from _flatten_aux(x)
-            else:
+        stack = [iter(lst)]
+        while stack:
+            for x in stack[-1]:
+                # the common cases are recognized by their exact type, with
+                # a single set lookup, before the (slower) generic check
+                if type(x) in _FLATTENED_TYPE or (
+                        type(x) not in _ATOMIC_TYPE and
+                        isinstance(x, collections.abc.Iterable) and
+                        not isinstance(x, (str, bytes))
+                ):
+                    stack.append(iter(x))
+                    break
                 yield x
+            else:
+                # this iterable is exhausted
+                stack.pop()
 
     gen = _flatten_aux(lst=lst)
 
@@ -44,9 +135,9 @@ def flatten(
 
 def iterable_from_list_or_dict(data: typing.Union[list, dict]) -> typing.Iterable:
     iterable = None
-    if type(data) is list:
+    if isinstance(data, list):
         iterable = data
-    elif type(dict) is dict:
+    elif isinstance(data, dict):
         iterable = data.values()
     else:
         # heuristic by
@@ -81,7 +172,12 @@ def merge_dict(
     if dest is None:
         return src
 
-    result = copy.deepcopy(src)
+    # only the lists are extended in place below, so only they need
+    # copying for the merge to leave `src` untouched
+    result = copy.copy(src)
+    for (key, value) in result.items():
+        if isinstance(value, list):
+            result[key] = list(value)
     for (key, value) in dest.items():
 
         # easy: new field
@@ -90,13 +186,21 @@ def merge_dict(
             continue
 
         # type list
-        if type(value) is list and type(result[key]) is list:
+        if isinstance(value, list) and isinstance(result[key], list):
 
             # concatenate results
             l = result[key]
-            for v in value:
-                if v not in l:
-                    l.append(v)
+            try:
+                # constant-time membership checks, for hashable values
+                seen = set(l)
+                for v in value:
+                    if v not in seen:
+                        seen.add(v)
+                        l.append(v)
+            except TypeError:
+                for v in value:
+                    if v not in l:
+                        l.append(v)
             result[key] = l
 
         else:
@@ -114,8 +218,11 @@ def merge_dict(
 
 
 def parseable_jinja2(s: str) -> bool:
+    # compiling is enough to check the syntax (and the compiled template is
+    # then already cached for rendering); rendering it without any data
+    # would only fail on patterns that use nested fields
     try:
-        jinja2.Template(s).render()
+        compile_jinja2(s)
     except jinja2.TemplateSyntaxError:
         return False
 
@@ -123,9 +230,10 @@ def parseable_jinja2(s: str) -> bool:
 
 
 def parseable_yaql(s: str) -> bool:
+    import yaql.language.exceptions
+
     try:
-        engine = yaql.factory.YaqlFactory().create()
-        engine(s)
+        _compile_yaql(s)
     except yaql.language.exceptions.YaqlGrammarException:
         return False
     except yaql.language.exceptions.YaqlLexicalException:
@@ -139,29 +247,30 @@ def parseable_yaql(s: str) -> bool:
 def find_jinja2_template_fields(
         jinja2_pattern: str
 ) -> typing.List[str]:
-    fields = []
 
-    # environment where missing fields raise exception
+    # the fields are the variables that the template expects from its
+    # context, which Jinja2 determines in a single walk of the parsed template
+    ast = _jinja2_environment.parse(jinja2_pattern)
 
-    env = jinja2.Environment(undefined=jinja2.StrictUndefined)
+    return sorted(jinja2.meta.find_undeclared_variables(ast))
 
-    # since only raise exception for one name at a time,
-    # iterate, and substitute all known fields by an empty
-    # string
 
-    while True:
-        try:
-            env.from_string(jinja2_pattern).render(
-                **{ field: "" for field in fields})
-        except jinja2.exceptions.UndefinedError as exc:
-            if "' is undefined" not in exc.message:
-                break
-            missing_field = exc.message.split("'")[1]
-            fields.append(missing_field)
-            continue
-        break
+def jinja2_context(
+        data: typing.Optional[typing.Union[list, dict]] = None,
+        vars: typing.Optional[typing.Dict[str, str]] = None,
+) -> typing.Optional[dict]:
+
+    if vars is None:
+        vars = dict()
+
+    if data is None:
+        return dict(vars=vars)
 
-    return fields
+    if isinstance(data, (list, collections.UserList)):
+        return dict(*data, record=data, vars=vars)
+
+    if isinstance(data, (dict, collections.UserDict)):
+        return dict(record=list(data.values()), vars=vars, **data)
 
 
 def render_jinja2(
@@ -170,25 +279,14 @@ def render_jinja2(
         vars: typing.Optional[typing.Dict[str, str]] = None,
 ) -> str:
 
-    if vars is None:
-        vars = dict()
-
-    if data is None or type(data) is None:
-        return jinja2.Template(jinja2_pattern).render(vars=vars)
-
-    if issubclass(type(data), list) or issubclass(type(data), collections.UserList):
-        return jinja2.Template(jinja2_pattern).render(
-            record=data, vars=vars, *data,
-        )
+    context = jinja2_context(data=data, vars=vars)
 
-    if issubclass(type(data), dict) or issubclass(type(data), collections.UserDict):
-        return jinja2.Template(jinja2_pattern).render(
-            record=list(data.values()), vars=vars, **data,
-        )
+    if context is not None:
+        return compile_jinja2_renderer(jinja2_pattern)(context)
 
 
 def unindex_data(data: typing.Union[list, dict]) -> list:
-    if issubclass(type(data), dict) or issubclass(type(data), collections.UserDict):
+    if isinstance(data, (dict, collections.UserDict)):
         data = list(data.values())
 
     return data
@@ -207,7 +305,7 @@ def reindex_user_data(
         if key_pattern is not None:
             return key_pattern
 
-        if issubclass(type(record), dict) or issubclass(type(record), collections.UserDict):
+        if isinstance(record, (dict, collections.UserDict)):
             if record.get("key") is not None:
                 return record.get("key")
 
@@ -217,7 +315,7 @@ def reindex_user_data(
 
             return "{{{{ {} }}}}".format(list(record.values())[0])
 
-        if issubclass(type(record), list) or issubclass(type(record), collections.UserList):
+        if isinstance(record, (list, collections.UserList)):
             return "{{ data[0] }}"
 
         if unmodify_default:
@@ -225,11 +323,21 @@ def reindex_user_data(
 
         return "{{ data }}"
 
-    def pick_key(record):
-        return render_jinja2(
-            jinja2_pattern=pick_key_pattern(record=record),
-            data=record,
-        )
+    if key_pattern is not None:
+        # the same key for all the records: no need to pick it for each
+        render_key = compile_jinja2_renderer(key_pattern)
+
+        def pick_key(record):
+            context = jinja2_context(data=record)
+            if context is not None:
+                return render_key(context)
+
+    else:
+        def pick_key(record):
+            return render_jinja2(
+                jinja2_pattern=pick_key_pattern(record=record),
+                data=record,
+            )
 
     reindexed_user_data = {
         pick_key(record): record
@@ -253,8 +361,7 @@ def refilter_user_data(
     user_data = unindex_data(data=user_data)
 
     # NOTE: should catch exceptions from Yaql for better error reporting
-    engine = yaql.factory.YaqlFactory().create()
-    expression = engine(filter_query)
+    expression = _compile_yaql(filter_query)
     filtered_user_data = expression.evaluate(data=user_data)
 
     if reindex:
@@ -272,7 +379,7 @@ def deduplicate_user_data(
         key: typing.Optional[str] = None,
 ) -> dict:
 
-    if issubclass(type(user_data), dict) or issubclass(type(user_data), collections.UserDict):
+    if isinstance(user_data, (dict, collections.UserDict)):
         # should already not have duplicates
         # but reindexing according to user-specified key if provided
         if key is not None:
@@ -281,7 +388,7 @@ def deduplicate_user_data(
                 key=key,
             )
 
-    elif issubclass(type(user_data), list) or issubclass(type(user_data), collections.UserList):
+    elif isinstance(user_data, (list, collections.UserList)):
 
         if key is not None:
             # reindex data according to key then return unindexed
@@ -3,18 +3,23 @@ import collections
 import copy
 import glob
 import fnmatch
+import functools
 import io
 import itertools
-import jinja2
 import json
 import os
+import re
 import textwrap
 import typing
 
-import comma
 import yaml
 import yaml.parser
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import slacktivate.helpers.dict_serializer
 import slacktivate.input.helpers
 
@@ -45,23 +50,22 @@ DEFAULT_EMAIL_INDEX = 0
 EMAIL_FIELD_NAME = "email"  # used only for alternate_emails feature
 ALTERNATE_EMAIL_FIELD_NAME = "alternate_emails"
 
+# use the libyaml-backed loader when PyYAML was built with it (resolved once,
+# at import); the "base" flavor is kept so all scalars still load as strings
+_SPECIFICATION_YAML_LOADER = getattr(yaml, "CBaseLoader", yaml.BaseLoader)
+
+# user sources are plain data, so they are loaded with the safe loader (which
+# PyYAML also requires to be explicit), again libyaml-backed when available
+_SOURCE_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class SlacktivateJSONEncoder(json.JSONEncoder):
 
     def default(self, obj):
         if isinstance(obj, SlacktivateConfigSection):
-            try:
-                result = super().default(
-                    obj._repr_dict_()
-                )
-            except TypeError:
-                pass
+            return obj._repr_dict_()
 
-        try:
-            result = super().default(obj)
-            return result
-        except TypeError:
-            pass
+        return super().default(obj)
 
 
 class SlacktivateConfigError(ValueError):
@@ -74,6 +78,15 @@ class SlacktivateConfigSection(collections.UserDict):
     _optional = []
     _strict = True
 
+    # computed once per class, when it is defined (see `__init_subclass__`)
+    _possible_fields: typing.FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._possible_fields = frozenset(
+            slacktivate.input.helpers.flatten([cls._required, cls._optional])
+        )
+
     def __init__(self, value, **kwargs):
         super().__init__(value, **kwargs)
         self._validate_fields(**kwargs)
@@ -86,7 +99,7 @@ class SlacktivateConfigSection(collections.UserDict):
 
             for field_or_fields in self._required:
 
-                if type(field_or_fields) is str:
+                if isinstance(field_or_fields, str):
                     if field_or_fields not in self:
                         missing_required.append(field_or_fields)
 
@@ -105,25 +118,33 @@ class SlacktivateConfigSection(collections.UserDict):
 
         # check there are no other fields if strict validation
         if self._strict:
-            _possible_fields = slacktivate.input.helpers.flatten([self._required, self._optional])
             for key in self.keys():
-                if key not in _possible_fields:
+                if key not in self._possible_fields:
                     raise SlacktivateConfigError(
                         ("strict validation of configuration {cls}; "
                          "found field '{field}' not from: {expected}").format(
                             cls=self.__class__.__name__,
                             field=key,
-                            expected=_possible_fields,
+                            expected=slacktivate.input.helpers.flatten([self._required, self._optional]),
                         )
                     )
 
+    def _clone_with(self, overrides: dict) -> "SlacktivateConfigSection":
+        # a shallow clone, with some fields replaced: the fields are not
+        # validated again, as they already were for the original
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.data = {**self.data, **overrides}
+        return clone
+
     def _repr_dict_(self) -> dict:
         return dict(self)
 
 
 class UserSourceException(ValueError):
     def __init__(self, message="", *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        # keep the message in the arguments, so it survives pickling
+        super().__init__(message, *args, **kwargs)
         self._message = message
 
     def __str__(self):
@@ -134,6 +155,36 @@ class UserSourceException(ValueError):
         return self._message if self._message is not None else ""
 
 
+def _parse_json(raw_data: typing.Union[bytes, str]) -> typing.Any:
+    # orjson (if installed) is much faster; but it only reads plain UTF-8,
+    # so anything it rejects (a byte order mark, UTF-16, NaN...) is handed
+    # to the standard library, which also reports the actual errors
+    if orjson is not None:
+        try:
+            return orjson.loads(raw_data)
+        except ValueError:
+            pass
+
+    return json.loads(raw_data)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_source_data(
+        raw_data: typing.Union[bytes, str],
+        source_type: str,
+) -> typing.Any:
+    # parsing YAML and CSV is much slower than copying the result, so the
+    # parsed data is kept (as in `_parse_specification_contents`), keyed on
+    # the raw data itself (which cannot go stale, unlike a file's mtime)
+    if source_type == "yaml":
+        return yaml.load(raw_data, Loader=_SOURCE_YAML_LOADER)
+
+    if source_type == "csv":
+        # only imported when needed, as it is slow to import
+        import comma
+        return list(map(dict, comma.load(raw_data, force_header=True)))
+
+
 class UserSourceConfig(SlacktivateConfigSection):
     # {
     #     "file": "filename.json",
@@ -240,7 +291,10 @@ class UserSourceConfig(SlacktivateConfigSection):
             file = files[0]
             self._source_name = file
 
-            raw_data = open(file).read()
+            # read as bytes: the parsers below detect the encoding (and skip
+            # any byte order mark) themselves, without a decoding pass here
+            with open(file, "rb") as f:
+                raw_data = f.read()
 
         elif "contents" in self:
             raw_data = self.get("contents")
@@ -249,13 +303,12 @@ class UserSourceConfig(SlacktivateConfigSection):
 
         # converting it in right format
         if self.get("type") == "json":
-            data = json.loads(raw_data)
-
-        elif self.get("type") == "yaml":
-            data = yaml.load(raw_data)
+            # parsing JSON is faster than copying a previous result would be
+            data = _parse_json(raw_data)
 
-        elif self.get("type") == "csv":
-            data = list(map(dict, comma.load(raw_data, force_header=True)))
+        elif self.get("type") in ("yaml", "csv"):
+            # copies are handed out, as the records are modified afterwards
+            data = copy.deepcopy(_parse_source_data(raw_data, self.get("type")))
 
         return data
 
@@ -266,73 +319,81 @@ class UserSourceConfig(SlacktivateConfigSection):
             alternate_emails: typing.Optional[typing.Dict[str, typing.List[str]]] = None,
     ) -> list:
 
-        if alternate_emails is not None:
-            # this is a feature to make sure that, when a user is known
-            # with an alias, that alias can be prioritized (or deprioritized)
-            # centrally through the `alternate_emails` mechanisms
-            # { ...
-            #     "user1@domain.com": ["user1@domain.com", "user1.alias@domain.com"],
-            # ... }
-            # => replace emails
-            iterable = slacktivate.input.helpers.iterable_from_list_or_dict(data)
-            for user_row in iterable:
-                # only place where EMAIL_FIELD_NAME is needed
-                email = user_row.get(EMAIL_FIELD_NAME)
-                if email is None:
-                    continue
-
-                ae_lookup = alternate_emails.get(email)
-                ae_lookup = ae_lookup or alternate_emails.get(email.lower())
-                if ae_lookup is None:
-                    continue
-
-                # shouldn't happen but let's see
-                if type(ae_lookup) is str:
-                    ae_lookup = [ae_lookup]
-
-                # ae_lookup should be a list
-                if email not in ae_lookup:
-                    ae_lookup += [email]
-
-                user_row[EMAIL_FIELD_NAME] = ae_lookup[DEFAULT_EMAIL_INDEX]
-                user_row[ALTERNATE_EMAIL_FIELD_NAME] = ae_lookup
-
-
         # the 'key' field is to reindex the database
-        if "key" in self and self.get("key") is not None:
-
-            key_pattern = self.get("key")
-
-            # reindex data
-            data = slacktivate.input.helpers.reindex_user_data(
-                user_data=data,
-                key=key_pattern,
-            )
-            iterable = slacktivate.input.helpers.iterable_from_list_or_dict(data)
-
-            # store the key
-            for record in iterable:
-                record["key"] = key_pattern
+        key_pattern = self.get("key")
+        render_key = None
+        if key_pattern is not None:
+            render_key = slacktivate.input.helpers.compile_jinja2_renderer(key_pattern)
 
         # create additional programmable fields
-        if "fields" in self and self.get("fields") is not None:
+        # (each pattern is compiled once, rather than once per record)
+        field_templates = {}
+        if self.get("fields") is not None:
+            for field_name, field_pattern in self.get("fields").items():
+
+                if isinstance(field_pattern, str):
+                    field_templates[field_name] = slacktivate.input.helpers.compile_jinja2_renderer(field_pattern)
+
+                elif isinstance(field_pattern, list):
+                    field_templates[field_name] = list(map(
+                        slacktivate.input.helpers.compile_jinja2_renderer,
+                        field_pattern,
+                    ))
+
+        def __process_record(record):
+            # all the steps are applied to each record in turn, in a single
+            # pass over the data; returns the record, with its new key
+
+            if alternate_emails is not None:
+                # this is a feature to make sure that, when a user is known
+                # with an alias, that alias can be prioritized (or deprioritized)
+                # centrally through the `alternate_emails` mechanisms
+                # { ...
+                #     "user1@domain.com": ["user1@domain.com", "user1.alias@domain.com"],
+                # ... }
+                # => replace emails
+                # only place where EMAIL_FIELD_NAME is needed
+                email = record.get(EMAIL_FIELD_NAME)
+                ae_lookup = None
+                if email is not None:
+                    ae_lookup = alternate_emails.get(email)
+                    ae_lookup = ae_lookup or alternate_emails.get(email.lower())
+
+                if ae_lookup is not None:
+                    # shouldn't happen but let's see
+                    if isinstance(ae_lookup, str):
+                        ae_lookup = [ae_lookup]
+
+                    # ae_lookup should be a list
+                    if email not in ae_lookup:
+                        ae_lookup += [email]
+
+                    record[EMAIL_FIELD_NAME] = ae_lookup[DEFAULT_EMAIL_INDEX]
+                    record[ALTERNATE_EMAIL_FIELD_NAME] = ae_lookup
+
+            key = None
+            if render_key is not None:
+                # the key is computed without the 'vars' (see `reindex_user_data`)
+                key = render_key(slacktivate.input.helpers.jinja2_context(data=record))
+
+                # store the key
+                record["key"] = key_pattern
 
-            def __expand_record(record):
+            if len(field_templates) > 0:
                 new_fields = {}
 
-                def formatter(pattern):
-                    return slacktivate.input.helpers.render_jinja2(
-                        jinja2_pattern=pattern,
-                        data=record,
-                        vars=vars,
-                    )
+                # the same context is used to render all the fields
+                context = slacktivate.input.helpers.jinja2_context(
+                    data=record,
+                    vars=vars,
+                )
 
-                for field_name, field_pattern in self.get("fields").items():
+                for field_name, field_template in field_templates.items():
 
-                    if isinstance(field_pattern, str):
-                        new_fields[field_name] = formatter(field_pattern)
+                    if not isinstance(field_template, list):
+                        new_fields[field_name] = field_template(context)
 
-                    elif isinstance(field_pattern, list):
+                    else:
 
                         # retrieve record's value for this field, if it exists
                         current_field_value = record.get(field_name, list())
@@ -340,34 +401,40 @@ class UserSourceConfig(SlacktivateConfigSection):
                             current_field_value = [current_field_value]
 
                         # format current field patterns:
-                        new_values = list(map(formatter, field_pattern))
+                        new_values = [
+                            render(context)
+                            for render in field_template
+                        ]
 
                         # assign field
                         new_fields[field_name] = current_field_value + new_values
 
-                # new_fields = {
-                #     field_name: slacktivate.input.helpers.render_jinja2(
-                #         jinja2_pattern=field_pattern,
-                #         data=record,
-                #         vars=vars,
-                #     )
-                #     for field_name, field_pattern in self.get("fields").items()
-                # }
                 record.update(new_fields)
-                return record
 
-            if issubclass(type(data), list) or issubclass(type(data), collections.UserList):
-                data = [
-                    __expand_record(record)
-                    for record in data
-                ]
+            return (key, record)
+
+        if alternate_emails is not None or render_key is not None or len(field_templates) > 0:
 
-            if issubclass(type(data), dict) or issubclass(type(data), collections.UserDict):
+            # the container type is dispatched on once, rather than per record
+            if render_key is not None:
+                # reindex data (records with the same key: the last one is kept)
+                data = dict(map(
+                    __process_record,
+                    slacktivate.input.helpers.unindex_data(data),
+                ))
+
+            elif isinstance(data, (dict, collections.UserDict)):
                 data = {
-                    key: __expand_record(record)
-                    for key, record in data.items()
+                    index: __process_record(record)[1]
+                    for (index, record) in data.items()
                 }
 
+            elif isinstance(data, (list, collections.UserList)):
+                data = [
+                    __process_record(record)[1]
+                    for record in data
+                ]
+
         # refilter data
         if "filter" in self and self.get("fields") is not None:
             data = slacktivate.input.helpers.refilter_user_data(
@@ -414,33 +481,36 @@ class UserGroupConfig(SlacktivateConfigSection):
 
         target_users = users
 
-        if self.get("filter") is not None:
+        filter_query = self.get("filter")
+
+        if filter_query is not None:
             target_users = slacktivate.input.helpers.refilter_user_data(
                 user_data=target_users,
-                filter_query=self.get("filter"),
+                filter_query=filter_query,
                 reindex=False,
             )
 
-        subgroup_users = {}
+        subgroup_users = collections.defaultdict(list)
+
+        # the name pattern is the same for all users, so it is compiled once
+        # (and the functions used in the loop are bound to locals beforehand)
+        render_name = slacktivate.input.helpers.compile_jinja2_renderer(self.get("name"))
+        jinja2_context = slacktivate.input.helpers.jinja2_context
 
         for user in slacktivate.input.helpers.unindex_data(target_users):
 
-            group_name = slacktivate.input.helpers.render_jinja2(
-                jinja2_pattern=self.get("name"),
-                data=user,
-                vars=vars,
-            )
+            context = jinja2_context(data=user, vars=vars)
+            group_name = render_name(context) if context is not None else None
 
-            subgroup_users[group_name] = subgroup_users.get(group_name, list())
             subgroup_users[group_name].append(user)
 
         groups = []
 
         for subgroup_name, subgroup_membership in subgroup_users.items():
 
-            group = copy.deepcopy(self)
-
-            group.update({
+            # a shallow clone: the new fields replace (rather than modify)
+            # the existing ones, and the users are shared with the config
+            group = self._clone_with({
                 "name": subgroup_name,
                 "users": subgroup_membership,
             })
@@ -450,6 +520,18 @@ class UserGroupConfig(SlacktivateConfigSection):
         return groups
 
 
+@functools.lru_cache(maxsize=None)
+def _compile_globs(globs: typing.Tuple[str, ...]) -> typing.Pattern:
+    # a single regular expression matching any of the globs (with the same
+    # semantics as `fnmatch.filter`), or nothing if there are no globs
+    if len(globs) == 0:
+        return re.compile("(?!)")
+    return re.compile("|".join(
+        fnmatch.translate(os.path.normcase(glob_pattern))
+        for glob_pattern in globs
+    ))
+
+
 class ChannelConfig(SlacktivateConfigSection):
     # {
     #     "name": "phd-{{ year }}",
@@ -480,55 +562,64 @@ class ChannelConfig(SlacktivateConfigSection):
 
         target_users = users
 
-        if self.get("groups") is not None:
-            group_globs = self.get("groups")
+        group_globs = self.get("groups")
 
-            if type(group_globs) is str:
-                group_globs = [group_globs]
+        if group_globs is not None:
 
-            group_names = list(map(lambda grp: grp.get("name"), groups))
-            globbed_names = list(set(itertools.chain(*[
-                    fnmatch.filter(group_names, group_glob)
-                    for group_glob in group_globs
-                ])))
+            if isinstance(group_globs, str):
+                group_globs = [group_globs]
 
-            target_users = list(itertools.chain(*[
-                grp.get("users")
+            # the groups whose name matches any of the globs are selected in
+            # a single pass (several groups may have the same name)
+            group_globs_regex = _compile_globs(tuple(group_globs))
+            globbed_groups = [
+                grp
                 for grp in groups
-                if grp.get("name") in globbed_names
-            ]))
+                if group_globs_regex.match(os.path.normcase(grp.get("name")))
+            ]
+
+            # a user in several of the groups is usually the same record, so
+            # these are dropped first, before rendering the keys of the rest
+            target_users = list({
+                id(user): user
+                for user in itertools.chain.from_iterable(
+                    grp.get("users")
+                    for grp in globbed_groups
+                )
+            }.values())
 
             target_users = slacktivate.input.helpers.deduplicate_user_data(
                 target_users
             )
 
-        if self.get("filter") is not None:
+        filter_query = self.get("filter")
+
+        if filter_query is not None:
             target_users = slacktivate.input.helpers.refilter_user_data(
                 user_data=target_users,
-                filter_query=self.get("filter"),
+                filter_query=filter_query,
                 reindex=False,
             )
 
-        subchannel_users = {}
+        subchannel_users = collections.defaultdict(list)
+
+        # (see `UserGroupConfig.compute`)
+        render_name = slacktivate.input.helpers.compile_jinja2_renderer(self.get("name"))
+        jinja2_context = slacktivate.input.helpers.jinja2_context
 
         for user in slacktivate.input.helpers.unindex_data(target_users):
 
-            channel_name = slacktivate.input.helpers.render_jinja2(
-                jinja2_pattern=self.get("name"),
-                data=user,
-                vars=vars,
-            )
+            context = jinja2_context(data=user, vars=vars)
+            channel_name = render_name(context) if context is not None else None
 
-            subchannel_users[channel_name] = subchannel_users.get(channel_name, list())
             subchannel_users[channel_name].append(user)
 
         channels = []
 
         for subchannel_name, subchanne_membership in subchannel_users.items():
 
-            channel = copy.deepcopy(self)
-
-            channel.update({
+            # a shallow clone (see `UserGroupConfig.compute`)
+            channel = self._clone_with({
                 "name": subchannel_name,
                 "users": subchanne_membership,
             })
@@ -538,8 +629,17 @@ class ChannelConfig(SlacktivateConfigSection):
         return channels
 
 
+@functools.lru_cache(maxsize=8)
+def _parse_specification_contents(contents: str) -> typing.Any:
+    # the same specification is often parsed several times by a long-lived
+    # process (a REPL, or a batch driver), so the parsed YAML is kept,
+    # keyed on the contents; copies are handed out, as callers modify it
+    # (the loader takes the string as-is, no need to wrap it in a stream)
+    return yaml.load(contents, Loader=_SPECIFICATION_YAML_LOADER)
+
+
 def _raw_parse_specification(
-        stream: typing.Optional[io.TextIOBase] = None,
+        stream: typing.Optional[typing.IO] = None,
         contents: typing.Optional[str] = None,
         filename: typing.Optional[str] = None,
 ) -> typing.Optional[dict]:
@@ -548,14 +648,18 @@ def _raw_parse_specification(
             stream.seek(0)
         except io.UnsupportedOperation:
             pass
-        contents = stream.read(),
+
+        # the YAML loader consumes (text or binary) streams directly, which
+        # avoids materializing the whole file as an intermediate string
+        return yaml.load(stream, Loader=_SPECIFICATION_YAML_LOADER)
 
     elif contents is not None:
         pass
 
     elif filename is not None and os.path.exists(filename):
-        with open(filename, mode="r") as f:
-            contents = f.read()
+        # binary mode: the YAML loader detects and decodes UTF-8/UTF-16 itself
+        with open(filename, mode="rb") as f:
+            return yaml.load(f, Loader=_SPECIFICATION_YAML_LOADER)
 
     else:
         # nothing is set
@@ -564,7 +668,7 @@ def _raw_parse_specification(
             "stream, filename, contents all `None`"
         )
 
-    obj = yaml.load(io.StringIO(contents), Loader=yaml.BaseLoader)
+    obj = copy.deepcopy(_parse_specification_contents(contents))
 
     return obj
 
@@ -589,13 +693,35 @@ class ParsingException(yaml.parser.ParserError):
     def filename(self, value: str):
         self._filename = value
 
+    @staticmethod
+    def _mark_to_dict(mark) -> typing.Optional[dict]:
+        # the marks of the libyaml-backed loader are extension objects, which
+        # have no `__dict__` and so cannot go through `to_dict`
+        if mark is None:
+            return
+        return {
+            "name": mark.name,
+            "line": mark.line,
+            "column": mark.column,
+        }
+
     @property
     def message(self):
-        jinja_template = jinja2.Template(source=self._EXCEPTION_MESSAGE_TEMPLATE)
-        data = slacktivate.helpers.dict_serializer.to_dict(self)
+        jinja_template = slacktivate.input.helpers.compile_jinja2(self._EXCEPTION_MESSAGE_TEMPLATE)
+
+        # `self.context` is the original exception raised by the YAML parser
+        original_exc = self.context
+        data = {
+            "context": {
+                "context": getattr(original_exc, "context", None),
+                "context_mark": self._mark_to_dict(getattr(original_exc, "context_mark", None)),
+                "problem": getattr(original_exc, "problem", None),
+                "problem_mark": self._mark_to_dict(getattr(original_exc, "problem_mark", None)),
+            }
+        }
 
         def replace_key(obj, key, value):
-            if issubclass(type(obj), dict):
+            if isinstance(obj, dict):
                 return {
                     _k: replace_key(_v, key, value) if _k != key else value
                     for (_k, _v) in obj.items()
@@ -611,7 +737,7 @@ class ParsingException(yaml.parser.ParserError):
 
 
 def parse_specification(
-        stream: typing.Optional[io.TextIOBase] = None,
+        stream: typing.Optional[typing.IO] = None,
         contents: typing.Optional[str] = None,
         filename: typing.Optional[str] = None,
 ) -> typing.Optional[dict]:
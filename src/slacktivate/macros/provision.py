@@ -42,6 +42,12 @@ The Slack API and Slack SCIM API maximum limit when returning paginated
 results (of users, channels, etc.).
 """
 
+MAX_CONVERSATION_INVITE_USERS = 1000
+"""
+The maximum number of users that can be invited to a channel in a single
+call to the Slack API method ``conversations.invite``.
+"""
+
 SLACK_BOTS_DOMAIN = "@slack-bots.com"
 """
 Domain name of email addresses associated with Slack apps and bots. This
@@ -790,8 +796,9 @@ def channels_ensure(
         # compute whether channel is private
         channel_is_private = False if "private" not in channel_def else channel_def.get("private") == True
 
-        # initialize the modifications' entry for dry_run
-        channels_modifications[channel_name] = channels_modifications.get(channel_name, dict())
+        # initialize the modifications' entry for dry_run (bound to a local,
+        # as it is updated throughout the loop)
+        modifications = channels_modifications.setdefault(channel_name, dict())
 
         # loop
 
@@ -817,20 +824,20 @@ def channels_ensure(
             ))
 
             # store information
-            channels_modifications[channel_name]["id"] = channel_id
-            channels_modifications[channel_name]["exists"] = True
-            channels_modifications[channel_name]["created"] = False
-            channels_modifications[channel_name]["members_ids_existing"] = list(existing_member_ids)
+            modifications["id"] = channel_id
+            modifications["exists"] = True
+            modifications["created"] = False
+            modifications["members_ids_existing"] = list(existing_member_ids)
 
         else:
             # store information
-            channels_modifications[channel_name]["exists"] = False
-            channels_modifications[channel_name]["created"] = False
-            channels_modifications[channel_name]["members_ids_existing"] = list()
+            modifications["exists"] = False
+            modifications["created"] = False
+            modifications["members_ids_existing"] = list()
 
             if dry_run:
                 # to indicate in output why action was not executed
-                channels_modifications[channel_name]["dry_run"] = True
+                modifications["dry_run"] = True
 
             else:
                 # try to create the channel
@@ -842,9 +849,9 @@ def channels_ensure(
                     channels_created[channel_name] = channel_id
 
                     # store information
-                    channels_modifications[channel_name]["id"] = channel_id
-                    channels_modifications[channel_name]["exists"] = True
-                    channels_modifications[channel_name]["created"] = True
+                    modifications["id"] = channel_id
+                    modifications["exists"] = True
+                    modifications["created"] = True
                 except:
                     # probably already exists, but private or inaccessible to
                     # user (NOTE: handle this better, maybe log?)
@@ -867,8 +874,8 @@ def channels_ensure(
             member_ids_to_kick = []
 
         # store that information
-        channels_modifications[channel_name]["members_ids_to_invite"] = member_ids_to_invite
-        channels_modifications[channel_name]["member_ids_to_kick"] = member_ids_to_kick
+        modifications["members_ids_to_invite"] = member_ids_to_invite
+        modifications["member_ids_to_kick"] = member_ids_to_kick
 
         # we computed the IDs to report the information back, but if `channel_id`
         # is non-existent, means we did not successfully create the channel
@@ -879,15 +886,23 @@ def channels_ensure(
         if dry_run is not None and dry_run:
             continue
 
-        try:
-            with slacktivate.slack.clients.managed_api(patch_reply_exception=True) as client:
-                client.conversations_invite(
-                    channel=channel_id,
-                    users=",".join(member_ids_to_invite),
-                )
-            channels_modifications[channel_name]["members_ids_added"] = member_ids_to_invite[:]
-        except:
-            pass
+        member_ids_added = []
+
+        # invite in batches, as many users as the API accepts per call
+        for i in range(0, len(member_ids_to_invite), MAX_CONVERSATION_INVITE_USERS):
+            member_ids_batch = member_ids_to_invite[i:i + MAX_CONVERSATION_INVITE_USERS]
+            try:
+                with slacktivate.slack.clients.managed_api(patch_reply_exception=True) as client:
+                    client.conversations_invite(
+                        channel=channel_id,
+                        users=",".join(member_ids_batch),
+                    )
+                member_ids_added += member_ids_batch
+            except:
+                continue
+
+        if len(member_ids_added) > 0:
+            modifications["members_ids_added"] = member_ids_added
 
         if dry_run is None or not dry_run:
             member_ids_removed = []
@@ -903,7 +918,7 @@ def channels_ensure(
                 except:
                     continue
 
-            channels_modifications[channel_name]["members_ids_removed"] = member_ids_removed
+            modifications["members_ids_removed"] = member_ids_removed
 
     return channels_modifications
 
@@ -10,6 +10,7 @@ import slack
 import slack.errors
 import slack_scim
 
+import slacktivate.helpers.dotenv
 import slacktivate.slack.exceptions
 
 
@@ -25,14 +26,7 @@ __all__ = [
 ]
 
 
-try:
-    import dotenv
-
-    if not dotenv.load_dotenv():
-        dotenv.load_dotenv(dotenv.find_dotenv())
-
-except ImportError:
-    raise
+slacktivate.helpers.dotenv.load_dotenv_once()
 
 
 # Get the slack token from the environment variable
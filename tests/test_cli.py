@@ -0,0 +1,171 @@
+import io
+import os
+import subprocess
+import sys
+import textwrap
+
+import click
+import click.testing
+import click_help_colors
+import pytest
+
+import slacktivate.cli.__main__
+import slacktivate.cli.helpers
+import slacktivate.helpers.dotenv
+
+
+SPEC_WITH_USERS = textwrap.dedent("""
+    users:
+      - type: csv
+        key: "{{ email }}"
+        contents: |
+          email,name
+          ann@example.com,Ann
+          bob@example.com,Bob
+    """)
+
+
+def test_lazy_subcommands_have_colored_help():
+    cli = slacktivate.cli.__main__.cli
+    ctx = click.Context(cli)
+
+    groups = [cli] + [
+        cli.get_command(ctx, name)
+        for name in ["list", "users", "channels"]
+    ]
+
+    for group in groups:
+        for name in group.list_commands(ctx):
+            command = group.get_command(ctx, name)
+            if isinstance(command, click.Group):
+                continue
+            assert isinstance(command, click_help_colors.HelpColorsCommand)
+            assert command.help_headers_color == "bright_green"
+            assert command.help_options_color == "green"
+
+
+def test_cli_import_does_not_load_slack_or_parsing():
+    # in a separate interpreter, as the other tests import everything
+    heavy_modules = [
+        "slack",
+        "slack_scim",
+        "jinja2",
+        "yaml",
+        "slacktivate.input.parsing",
+        "slacktivate.input.config",
+        "slacktivate.slack.clients",
+    ]
+    script = (
+        "import sys, slacktivate.cli.__main__; "
+        "print(','.join(m for m in {!r} if m in sys.modules))"
+    ).format(heavy_modules)
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+
+    assert result.stdout.decode().strip() == ""
+
+
+@pytest.mark.parametrize("args", [
+    ["users", "list"],
+    ["list", "users"],
+])
+def test_list_users_parses_spec_argument(tmp_path, monkeypatch, args):
+    monkeypatch.chdir(tmp_path)
+
+    # the default specification (of the root group's --spec) has no users,
+    # so the users can only come from the SPEC argument of the subcommand
+    (tmp_path / "specification.yaml").write_text("users: []\n")
+    (tmp_path / "other.yaml").write_text(SPEC_WITH_USERS)
+
+    runner = click.testing.CliRunner(env={"SLACKTIVATE_NO_DOTENV": "1"})
+    result = runner.invoke(
+        slacktivate.cli.__main__.cli,
+        args + ["--format", "csv", "other.yaml"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == [
+        "email,name,key",
+        "ann@example.com,Ann,{{ email }}",
+        "bob@example.com,Bob,{{ email }}",
+    ]
+
+
+def test_root_options_read_from_dotenv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    # there is no default specification, only the one named in .env
+    (tmp_path / "other.yaml").write_text(SPEC_WITH_USERS)
+    (tmp_path / ".env").write_text("SLACKTIVATE_SPEC=other.yaml\n")
+
+    # the .env file is otherwise only loaded once per process
+    slacktivate.helpers.dotenv.load_dotenv_once.cache_clear()
+
+    # (the variables are restored or removed after the invocation)
+    runner = click.testing.CliRunner(env={
+        "SLACKTIVATE_NO_DOTENV": None,
+        "SLACKTIVATE_SPEC": None,
+        "SLACKTIVATE_CONFIG": None,
+    })
+    try:
+        result = runner.invoke(
+            slacktivate.cli.__main__.cli,
+            ["list", "users"],
+        )
+    finally:
+        slacktivate.helpers.dotenv.load_dotenv_once.cache_clear()
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == ["ann@example.com", "bob@example.com"]
+
+
+def test_echo_csv_field_union_and_order():
+    stream = io.StringIO()
+
+    slacktivate.cli.helpers.echo_csv(
+        records=[
+            {"b": 1, "a": 2},
+            {"c": 3},
+            {"a": 4, "d": "x,y"},
+        ],
+        stream=stream,
+    )
+
+    # fields in order of first appearance, missing ones left blank
+    assert stream.getvalue().splitlines() == [
+        "b,a,c,d",
+        "1,2,,",
+        ",,3,",
+        ',4,,"x,y"',
+    ]
+
+
+def test_dumps_json():
+    import slacktivate.input.parsing
+
+    obj = {
+        "name": "Jérémie",
+        "nested": {"list": [1, None, True]},
+        "channel": slacktivate.input.parsing.ChannelConfig({"name": "general"}),
+    }
+
+    assert slacktivate.cli.helpers.dumps_json(obj) == textwrap.dedent("""
+        {
+          "name": "Jérémie",
+          "nested": {
+            "list": [
+              1,
+              null,
+              true
+            ]
+          },
+          "channel": {
+            "name": "general"
+          }
+        }
+        """).strip()
@@ -0,0 +1,42 @@
+import copy
+import json
+import textwrap
+
+import slacktivate.input.config
+
+
+SPEC = textwrap.dedent("""
+    settings:
+      keep_customized_photos: true
+    users:
+      - type: csv
+        key: "{{ email }}"
+        contents: |
+          email,name
+          ann@example.com,Ann
+          bob@example.com,Bob
+    groups:
+      - name: "{{ name }}-group"
+    """)
+
+
+def test_config_properties_are_plain_copies():
+    config = slacktivate.input.config.SlacktivateConfig.from_specification(contents=SPEC)
+
+    users = config.users
+    settings = config.settings
+
+    assert isinstance(users, dict)
+    assert isinstance(settings, dict)
+    assert isinstance(config.groups, list)
+    assert isinstance(config.channels, list)
+
+    assert json.loads(json.dumps(users))["ann@example.com"]["name"] == "Ann"
+    assert json.loads(json.dumps(settings)) == {"keep_customized_photos": True}
+    assert copy.deepcopy(users) == users
+
+    # the copy is made once, and is not the compiled configuration itself
+    assert config.users is users
+    users["ann@example.com"]["name"] = "modified"
+    assert config._users["ann@example.com"]["name"] == "Ann"
+    assert config.groups[0]["users"][0]["name"] == "Ann"
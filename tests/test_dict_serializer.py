@@ -0,0 +1,118 @@
+import pytest
+
+import slacktivate.helpers.dict_serializer
+
+
+class _Profile:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_to_dict_nested_objects():
+    user = _Profile(
+        id="U1",
+        profile=_Profile(email="ann@example.com", fields={"title": _Profile(value="TA")}),
+        groups=["ta", "phd"],
+        deleted=False,
+    )
+
+    result = slacktivate.helpers.dict_serializer.to_dict(user)
+
+    assert result == {
+        "id": "U1",
+        "profile": {
+            "email": "ann@example.com",
+            "fields": {"title": {"value": "TA"}},
+        },
+        "groups": ["ta", "phd"],
+        "deleted": False,
+    }
+    assert list(result) == ["id", "profile", "groups", "deleted"]
+    assert list(result["profile"]) == ["email", "fields"]
+
+
+def test_to_dict_flat_dict_is_copied():
+    obj = {"a": 1, "b": "x", "c": None, "d": [1, 2]}
+
+    result = slacktivate.helpers.dict_serializer.to_dict(obj)
+
+    assert result == obj
+    assert result is not obj
+    assert list(result) == list(obj)
+
+
+def test_to_flat_dict():
+    obj = _Profile(a=1, b={"c": {"d": 2, "e": [3]}, "f": None}, g="h")
+
+    result = slacktivate.helpers.dict_serializer.to_flat_dict(obj)
+
+    # leaves in their original (depth-first) order
+    assert list(result.items()) == [
+        ("a", 1),
+        ("b.c.d", 2),
+        ("b.c.e", [3]),
+        ("b.f", None),
+        ("g", "h"),
+    ]
+
+
+def test_dict_to_flat_dict_already_flat():
+    obj = {"a": 1, "b": "x"}
+
+    assert slacktivate.helpers.dict_serializer.dict_to_flat_dict(obj) == obj
+
+
+def test_add_missing_dict_fields():
+    result = slacktivate.helpers.dict_serializer.add_missing_dict_fields(
+        [{"b": 1}, {"a": 2, "b": 3}, {}],
+    )
+
+    assert result == [
+        {"b": 1, "a": ""},
+        {"b": 3, "a": 2},
+        {"b": "", "a": ""},
+    ]
+    assert [list(d) for d in result] == [["b", "a"]] * 3
+
+
+def test_to_dict_deeply_nested():
+    depth = 10000
+
+    nested = dict()
+    current = nested
+    for _ in range(depth):
+        current["next"] = dict()
+        current = current["next"]
+
+    result = slacktivate.helpers.dict_serializer.to_dict(nested)
+
+    for _ in range(depth):
+        assert list(result.keys()) == ["next"]
+        result = result["next"]
+    assert result == dict()
+
+
+def test_to_dict_circular_reference():
+    obj = {"a": 1}
+    obj["self"] = obj
+
+    with pytest.raises(ValueError):
+        slacktivate.helpers.dict_serializer.to_dict(obj)
+
+
+def test_to_dict_shared_dict_is_not_circular():
+    shared = {"z": 1}
+    obj = {"a": shared, "b": {"c": shared}}
+
+    assert slacktivate.helpers.dict_serializer.to_dict(obj) == {
+        "a": {"z": 1},
+        "b": {"c": {"z": 1}},
+    }
+
+
+def test_dict_to_flat_dict_circular_reference():
+    obj = {"a": {"b": 1}}
+    obj["a"]["parent"] = obj
+
+    with pytest.raises(ValueError):
+        slacktivate.helpers.dict_serializer.dict_to_flat_dict(obj)
@@ -11,6 +11,7 @@ def test_import_all():
     import slacktivate.cli
     import slacktivate.helpers.collections
     import slacktivate.helpers.dict_serializer
+    import slacktivate.helpers.dotenv
     import slacktivate.helpers.photo
     import slacktivate.helpers
     import slacktivate.input.config
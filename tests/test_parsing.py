@@ -0,0 +1,63 @@
+import codecs
+
+import slacktivate.input.parsing
+
+
+def test_csv_source_loaded_twice_gives_separate_records(tmp_path):
+    source_file = tmp_path / "users.csv"
+    source_file.write_text("email,name\nann@example.com,Ann\nbob@example.com,Bob\n")
+
+    source = slacktivate.input.parsing.UserSourceConfig({
+        "type": "csv",
+        "file": str(source_file),
+    })
+
+    first = source.load(vars=None)
+    first[0]["name"] = "modified"
+
+    # the parsed data may be reused, but never the records handed out
+    second = source.load(vars=None)
+    assert second == [
+        {"email": "ann@example.com", "name": "Ann"},
+        {"email": "bob@example.com", "name": "Bob"},
+    ]
+
+
+def test_csv_source_reloaded_after_change(tmp_path):
+    source_file = tmp_path / "users.csv"
+    source_file.write_text("email,name\nann@example.com,Ann\n")
+
+    source = slacktivate.input.parsing.UserSourceConfig({
+        "type": "csv",
+        "file": str(source_file),
+    })
+
+    assert source.load(vars=None) == [{"email": "ann@example.com", "name": "Ann"}]
+
+    source_file.write_text("email,name\nbob@example.com,Bob\n")
+    assert source.load(vars=None) == [{"email": "bob@example.com", "name": "Bob"}]
+
+
+def test_json_and_yaml_sources(tmp_path):
+    json_file = tmp_path / "users.json"
+    json_file.write_bytes(
+        codecs.BOM_UTF8 + '[{"email": "ann@example.com", "name": "Jérémie"}]'.encode("utf-8")
+    )
+
+    yaml_file = tmp_path / "users.yaml"
+    yaml_file.write_text("- email: ann@example.com\n  name: Jérémie\n", encoding="utf-8")
+
+    for (source_type, source_file) in [("json", json_file), ("yaml", yaml_file)]:
+        source = slacktivate.input.parsing.UserSourceConfig({
+            "type": source_type,
+            "file": str(source_file),
+            "key": "{{ email }}",
+        })
+
+        assert source.load(vars=None) == {
+            "ann@example.com": {
+                "email": "ann@example.com",
+                "name": "Jérémie",
+                "key": "{{ email }}",
+            },
+        }
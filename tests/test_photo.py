@@ -0,0 +1,30 @@
+import types
+
+import slacktivate.helpers.photo
+
+
+def test_request_image_does_not_cache_failures(monkeypatch):
+    photo = slacktivate.helpers.photo
+    url = "https://example.com/avatar.png"
+
+    responses = [
+        types.SimpleNamespace(ok=False, content=b""),
+        types.SimpleNamespace(ok=True, content=photo.ANONYMOUS_AVATAR_BINARY_DATA),
+    ]
+    calls = []
+
+    def fake_get(image_url):
+        calls.append(image_url)
+        return responses.pop(0)
+
+    monkeypatch.setattr(photo._requests_session, "get", fake_get)
+    monkeypatch.setattr(photo, "_image_cache", dict())
+
+    # a failed request is tried again
+    assert photo._request_image(image_url=url) is None
+    img = photo._request_image(image_url=url)
+    assert img is not None
+
+    # but a successful one is not
+    assert photo._request_image(image_url=url) is img
+    assert calls == [url, url]
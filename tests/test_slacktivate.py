@@ -1,5 +1,9 @@
-from slacktivate import __version__
+from slacktivate import __version__, version_info
 
 
 def test_version():
     assert __version__ == "0.2.26"
+
+
+def test_version_info():
+    assert ".".join(map(str, version_info)) == __version__